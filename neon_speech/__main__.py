@@ -18,10 +18,14 @@
 # SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
 # WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
 # USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import asyncio
+import audioop
 import neon_speech
 import os.path
 import time
-from threading import Lock
+from base64 import b64decode
+from concurrent.futures import as_completed, ThreadPoolExecutor
+from threading import BoundedSemaphore, Condition, Lock
 from typing import Optional
 
 from mycroft.configuration import Configuration
@@ -31,12 +35,13 @@ from mycroft.util.log import LOG
 from mycroft_bus_client import MessageBusClient
 from neon_speech.listener import RecognizerLoop
 from neon_speech.plugins import AudioParsersService
-from neon_speech.stt import STTFactory
-from neon_speech.utils import get_audio_file_stream
+from neon_speech.stt import STTWorkerPool, stt_config_hash, stt_registry
+from neon_speech.stt_cache import TranscriptionCache
+from neon_speech.utils import read_audio_file, iter_audio_chunks, \
+    decode_audio_data
 from ovos_utils import create_daemon, wait_for_exit_signal
 from ovos_utils.json_helper import merge_dict
 from ovos_utils.messagebus import Message, get_mycroft_bus
-from pydub import AudioSegment
 from speech_recognition import AudioData
 
 bus: Optional[MessageBusClient] = None  # Mycroft messagebus connection
@@ -44,6 +49,8 @@ loop: Optional[RecognizerLoop] = None
 config: Optional[dict] = None
 external_stt = None
 service = None
+init_timing: Optional[dict] = None  # Set once STT and hotwords are warm
+init_start: Optional[float] = None
 
 
 def handle_record_begin():
@@ -97,6 +104,14 @@ def handle_utterance(event):
     bus.emit(Message('recognizer_loop:utterance', event, context))
 
 
+def handle_mic_level(event):
+    """Forward microphone level to the messagebus."""
+    context = {'client_name': 'neon_speech',
+               'source': 'audio',
+               'destination': ["skills"]}
+    bus.emit(Message('neon.mic_level', event, context))
+
+
 def handle_wake_words_state(message):
     enabled = message.data.get("enabled", True)
     loop.change_wake_word_state(enabled)
@@ -175,6 +190,38 @@ def handle_mic_get_status(message: Message):
     bus.emit(message)
 
 
+def handle_loop_ready():
+    """Report readiness once the RecognizerLoop has leased its STT engine."""
+    global init_timing
+    init_timing = {"stt": stt_registry.init_timing.get(
+                       stt_config_hash(loop.config_core), {}),
+                   "hotwords": dict(loop.hotword_timing),
+                   "total": time.time() - init_start}
+    LOG.info(f"Speech service ready: {init_timing}")
+    bus.emit(Message("neon.speech.ready", {"timing": init_timing},
+                     {"client_name": "neon_speech",
+                      "source": "audio",
+                      "destination": ["skills"]}))
+
+
+def handle_get_ready_status(message: Message):
+    """Query whether STT and hotword engines are initialized."""
+    bus.emit(message.response({"ready": init_timing is not None,
+                               "timing": init_timing}))
+
+
+def handle_get_queue_stats(message: Message):
+    """Query depth and drop counters of the recognizer audio queue."""
+    stats = loop.queue.stats if loop.queue is not None else {}
+    bus.emit(message.response(stats))
+
+
+def handle_get_parser_stats(message: Message):
+    """Query queue and latency stats of audio parsers."""
+    stats = service.parser_stats if service is not None else {}
+    bus.emit(message.response(stats))
+
+
 def handle_audio_start(message: Message):
     """Mute recognizer loop."""
     if config.get("listener").get("mute_during_output"):
@@ -194,16 +241,256 @@ def handle_stop(message: Message):
     loop.force_unmute()
 
 
+class BusAudioStream:
+    """
+    State of an audio stream received as a sequence of messagebus messages.
+    Chunks are converted to the engine sample format and fed to a streaming
+    STT engine as they arrive; for non-streaming engines they are buffered
+    and no engine is held until the stream is transcribed at the end.
+    """
+    def __init__(self, message: Message, sample_rate: int):
+        self.message = message
+        self.stt = None
+        self.lang = message.data.get("lang")
+        self.sample_rate = sample_rate
+        self.source_rate = message.data.get("sample_rate", sample_rate)
+        self.source_width = message.data.get("sample_width", 2)
+        self.lock = Condition()
+        self.frames = bytearray()
+        self.transcript = None
+        self.closed = False
+        self.started = False
+        self.last_activity = time.time()
+        self._next_index = 0
+        self._pending = {}
+        self._ratecv_state = None
+
+    def start(self, stt=None):
+        """
+        Start accepting audio; chunks received while the engine was being
+        loaded are fed to it now
+        :param stt: streaming STT engine leased for this stream, None to
+            buffer audio for a non-streaming engine
+        :return: False if the stream was closed and stt should be released
+        """
+        with self.lock:
+            if self.closed:
+                return False
+            self.stt = stt
+            self.started = True
+            if self.stt:
+                self.stt.stream_start(self.lang)
+            self._feed_pending()
+            return True
+
+    def close(self):
+        """
+        Abandon the stream
+        :return: STT engine to release, if one was leased
+        """
+        with self.lock:
+            self.closed = True
+            stt, self.stt = self.stt, None
+            try:
+                if stt:
+                    stt.stream_stop()
+            except Exception as e:
+                LOG.error(e)
+            self.lock.notify_all()
+            return stt
+
+    def add_chunk(self, chunk: bytes, index: int = None) -> bool:
+        """
+        Add a chunk of PCM audio to the stream
+        :param chunk: PCM audio in the stream's source format
+        :param index: optional position of chunk in the stream; out of order
+            chunks are held until all previous chunks have been added
+        :return: True if the interim transcript changed
+        """
+        with self.lock:
+            self.last_activity = time.time()
+            index = self._next_index if index is None else index
+            self._pending[index] = chunk
+            if not self.started or self.closed:
+                return False
+            self._feed_pending()
+            text = getattr(getattr(self.stt, "stream", None), "text", None)
+            if text and text != self.transcript:
+                self.transcript = text
+                return True
+            return False
+
+    def _feed_pending(self):
+        while self._next_index in self._pending:
+            self._feed(self._pending.pop(self._next_index))
+            self._next_index += 1
+        self.lock.notify_all()
+
+    def _feed(self, chunk: bytes):
+        if self.source_width != 2:
+            chunk = audioop.lin2lin(chunk, self.source_width, 2)
+        if self.source_rate != self.sample_rate:
+            chunk, self._ratecv_state = audioop.ratecv(
+                chunk, 2, 1, self.source_rate, self.sample_rate,
+                self._ratecv_state)
+        self.frames.extend(chunk)
+        if self.stt:
+            self.stt.stream_data(chunk)
+
+    def finish(self, chunks: int = None,
+               timeout: float = None) -> (AudioData, list):
+        """
+        End the stream and get the final transcription
+        :param chunks: total number of chunks sent; if specified, wait for
+            chunks still in transit before finishing
+        :param timeout: max seconds to wait for chunks in transit
+        :return: (AudioData of the whole stream, transcriptions or None if
+            the audio still needs to be transcribed)
+        """
+        with self.lock:
+            if not self.lock.wait_for(
+                    lambda: self.closed or
+                    (self.started and self._next_index >= (chunks or 0)),
+                    timeout) or self.closed:
+                if not self.started:
+                    # an engine leased after this is released by start
+                    self.closed = True
+                    raise TimeoutError("STT engine not ready for stream")
+                LOG.warning(f"Finishing stream with {self._next_index}/"
+                            f"{chunks} chunks")
+            audio_data = AudioData(bytes(self.frames), self.sample_rate, 2)
+            transcriptions = self.stt.stream_stop() if self.stt else None
+            return audio_data, transcriptions
+
+
 class ExternalSTTService:
     def __init__(self, bus):
-        self.lock = Lock()
         self.bus = bus
-        self.stt = STTFactory.create(config=config)
+        stt_config = config.get("stt", {})
+        self.sample_rate = config.get("listener", {}).get("sample_rate",
+                                                          16000)
+        self.pool = STTWorkerPool(config=config,
+                                  workers=stt_config.get("api_workers", 1),
+                                  max_pending=stt_config.get(
+                                      "api_max_pending", 16))
+        cache_config = stt_config.get("cache", {})
+        self.cache = TranscriptionCache(cache_config,
+                                        stt_config_hash(config)) \
+            if cache_config.get("enabled", True) else None
+        # Requests are handled as asyncio tasks so slow transcriptions never
+        # block the messagebus client thread. Requests are only admitted
+        # here, so never admit more than the STT pool can hold.
+        self.max_in_flight = min(stt_config.get("api_max_in_flight", 32),
+                                 self.pool.capacity)
+        self.default_timeout = stt_config.get("api_timeout", 60)
+        self._in_flight = 0
+        self._expired = set()
+        self._loop = asyncio.new_event_loop()
+        self._loop.set_default_executor(ThreadPoolExecutor(
+            max_workers=self.max_in_flight,
+            thread_name_prefix="stt_request"))
+        create_daemon(self._loop.run_forever)
         # Register API Handlers
-        self.bus.on("neon.get_stt", self.handle_get_stt)
-        self.bus.on("neon.audio_input", self.handle_audio_input)
+        self.bus.on("neon.get_stt",
+                    self._async_handler(self.handle_get_stt,
+                                        "neon.get_stt.response"))
+        self.bus.on("neon.get_stt.batch",
+                    self._async_handler(self.handle_get_stt_batch,
+                                        "neon.get_stt.batch.response"))
+        self.bus.on("neon.audio_input",
+                    self._async_handler(self.handle_audio_input,
+                                        "neon.audio_input.response"))
         self.bus.on('recognizer_loop:klat_utterance',
-                    self.handle_input_from_klat)  # TODO: Depreciate and move to server module DM
+                    self._async_handler(self.handle_input_from_klat))  # TODO: Depreciate and move to server module DM
+        # Streaming audio input
+        self.stream_timeout = stt_config.get("api_stream_timeout", 30)
+        self.max_streams = stt_config.get("api_max_streams", 4)
+        self._streams = {}
+        self._streams_lock = Lock()
+        self._expiry_scheduled = False
+        self._start_stream = self._async_handler(self._start_audio_stream,
+                                                 "neon.audio_input.response")
+        self.bus.on("neon.audio_input.stream.start",
+                    self.handle_audio_stream_start)
+        self.bus.on("neon.audio_input.stream.data",
+                    self.handle_audio_stream_data)
+        self.bus.on("neon.audio_input.stream.stop",
+                    self._async_handler(self.handle_audio_stream_stop,
+                                        "neon.audio_input.response"))
+
+    def _async_handler(self, handler, response_type: str = None):
+        """
+        Wrap a request handler so it is scheduled on the asyncio loop and the
+        messagebus client thread returns immediately
+        :param handler: request handler to wrap
+        :param response_type: default response type for error replies
+        :return: messagebus handler
+        """
+        def wrapped(message: Message):
+            asyncio.run_coroutine_threadsafe(
+                self._handle_request(handler, message, response_type),
+                self._loop)
+        return wrapped
+
+    async def _handle_request(self, handler, message: Message,
+                              response_type: str = None):
+        """
+        Run a request handler with backpressure and a deadline. The deadline
+        is read from message context as a `timeout` in seconds or a `deadline`
+        epoch time, falling back to `stt.api_timeout`.
+        :param handler: request handler to run in an executor thread
+        :param message: Message associated with request
+        :param response_type: default response type for error replies
+        """
+        ident = message.context.get("ident") or response_type
+        if self._in_flight >= self.max_in_flight:
+            LOG.warning(f"Rejecting {message.msg_type}: too many requests")
+            if ident:
+                self.bus.emit(message.reply(ident, data={
+                    "error": "Too many requests in flight"}))
+            return
+        if message.context.get("deadline"):
+            timeout = message.context["deadline"] - time.time()
+        else:
+            timeout = message.context.get("timeout") or self.default_timeout
+        if timeout <= 0:
+            LOG.warning(f"Rejecting {message.msg_type}: deadline passed")
+            if ident:
+                self.bus.emit(message.reply(ident, data={
+                    "error": "Request deadline already passed"}))
+            return
+        self._in_flight += 1
+        request_id = id(message)
+
+        def _on_done(_):
+            # Requests count against max_in_flight until the handler exits
+            self._in_flight -= 1
+            self._expired.discard(request_id)
+
+        future = self._loop.run_in_executor(None, handler, message)
+        future.add_done_callback(_on_done)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            LOG.error(f"{message.msg_type} exceeded deadline ({timeout}s)")
+            self._expired.add(request_id)
+            if ident:
+                self.bus.emit(message.reply(ident, data={
+                    "error": f"Request timed out after {timeout}s"}))
+        except Exception as e:
+            LOG.exception(e)
+
+    def _emit(self, request: Message, message: Message):
+        """
+        Emit a message in response to a request unless the request has
+        already been answered with a timeout error
+        :param request: Message associated with request
+        :param message: Message to emit
+        """
+        if id(request) in self._expired:
+            LOG.debug(f"Dropping late response: {message.msg_type}")
+            return
+        self.bus.emit(message)
 
     # TODO: Depreciate this method
     def handle_input_from_klat(self, message):
@@ -240,9 +527,10 @@ class ExternalSTTService:
 
                 if message.data.get("need_transcription"):
                     LOG.debug(f"return stt to server: {transcriptions}")
-                    bus.emit(Message("css.emit", {"event": "stt from mycroft",
-                                                  "data": [transcriptions[0],
-                                                           request_id]}))
+                    self._emit(message, Message(
+                        "css.emit", {"event": "stt from mycroft",
+                                     "data": [transcriptions[0],
+                                              request_id]}))
             except Exception as x:
                 LOG.error(x)
                 transcriptions = [message.data.get("shout_text")]
@@ -286,79 +574,332 @@ class ExternalSTTService:
                    "ident": ident
                    }
         LOG.debug("Send server request to skills for processing")
-        bus.emit(Message('recognizer_loop:utterance', data, context))
+        self._emit(message,
+                   Message('recognizer_loop:utterance', data, context))
 
     def handle_get_stt(self, message: Message):
         """
         Handles a request for stt. Emits a response to the sender with stt data or error data
-        :param message: Message associated with request
+        :param message: Message associated with request; audio is passed as
+            an `audio_file` path or as inline `audio_data` (see _get_audio_data)
         """
         wav_file_path = message.data.get("audio_file")
         lang = message.data.get("lang")
         ident = message.context.get("ident") or "neon.get_stt.response"
-        if not wav_file_path:
-            bus.emit(message.reply(ident, data={
+        if not wav_file_path and not message.data.get("audio_data"):
+            self._emit(message, message.reply(ident, data={
                 "error": f"audio_file not specified!"}))
+            return
 
-        if not os.path.isfile(wav_file_path):
-            bus.emit(message.reply(ident, data={
+        if wav_file_path and not os.path.isfile(wav_file_path):
+            self._emit(message, message.reply(ident, data={
                 "error": f"{wav_file_path} Not found!"}))
+            return
 
         try:
-            _, parser_data, transcriptions = self._get_stt_from_file(
-                wav_file_path, lang)
-            bus.emit(message.reply(ident, data={"parser_data": parser_data,
-                                                "transcripts": transcriptions}))
+            _, parser_data, transcriptions = self._get_stt_from_audio(
+                self._get_audio_data(message.data), lang)
+            self._emit(message, message.reply(
+                ident, data={"parser_data": parser_data,
+                             "transcripts": transcriptions}))
+        except Exception as e:
+            LOG.error(e)
+            self._emit(message,
+                       message.reply(ident, data={"error": repr(e)}))
+
+    def handle_get_stt_batch(self, message: Message):
+        """
+        Handles a request for stt of multiple audio inputs. Emits a
+        `neon.get_stt.batch.item` message as each item completes, followed by
+        a response to the sender with results for every item.
+        :param message: Message associated with request; `items` is a list of
+            audio file paths or dicts with `audio_file` or `audio_data`
+        """
+        items = message.data.get("items") or []
+        lang = message.data.get("lang")
+        ident = message.context.get("ident") or \
+            "neon.get_stt.batch.response"
+        if not items:
+            self._emit(message, message.reply(ident, data={
+                "error": f"items not specified!"}))
+            return
+
+        results = [None] * len(items)
+
+        def _emit_result(index, result):
+            results[index] = result
+            self._emit(message, message.reply("neon.get_stt.batch.item",
+                                   data={"index": index, **result}))
+
+        def _handle_transcriptions(index, transcriptions):
+            try:
+                _, parser_data = service.get_context(audio[index])
+                _emit_result(index, {"parser_data": parser_data,
+                                     "transcripts": transcriptions})
+            except Exception as x:
+                LOG.error(x)
+                _emit_result(index, {"error": repr(x)})
+
+        audio = {}
+        for idx, item in enumerate(items):
+            try:
+                audio[idx] = self._get_audio_data(item)
+            except Exception as e:
+                LOG.error(e)
+                _emit_result(idx, {"error": repr(e)})
+
+        indices = []
+        cache_keys = {}
+        for idx in audio:
+            cache_keys[idx] = self._get_cache_key(audio[idx], lang)
+            transcriptions = self._get_cached_transcriptions(cache_keys[idx])
+            if transcriptions is None:
+                indices.append(idx)
+            else:
+                _handle_transcriptions(idx, transcriptions)
+        try:
+            if indices and self.pool.supports_batch:
+                batch = self.pool.run(
+                    lambda stt: stt.execute_batch(
+                        [audio[i] for i in indices], lang), block=True)
+                for idx, transcriptions in zip(indices, batch):
+                    self._cache_transcriptions(cache_keys[idx],
+                                               transcriptions)
+                    _handle_transcriptions(idx, transcriptions)
+            else:
+                # leave pool slots free for concurrent single requests
+                batch_slots = BoundedSemaphore(self.pool.workers)
+                futures = {}
+                for idx in indices:
+                    batch_slots.acquire()
+                    future = self.pool.submit(self._transcribe, audio[idx],
+                                              lang, block=True)
+                    future.add_done_callback(
+                        lambda _: batch_slots.release())
+                    futures[future] = idx
+                for future in as_completed(futures):
+                    idx = futures[future]
+                    try:
+                        transcriptions = future.result()
+                    except Exception as e:
+                        LOG.error(e)
+                        _emit_result(idx, {"error": repr(e)})
+                        continue
+                    self._cache_transcriptions(cache_keys[idx],
+                                               transcriptions)
+                    _handle_transcriptions(idx, transcriptions)
+            self._emit(message, message.reply(ident,
+                                              data={"results": results}))
         except Exception as e:
             LOG.error(e)
-            bus.emit(message.reply(ident, data={"error": repr(e)}))
+            self._emit(message,
+                       message.reply(ident, data={"error": repr(e)}))
 
     def handle_audio_input(self, message):
         """
         Handles remote audio input to Neon.
-        :param message:
-        :return:
+        :param message: Message associated with request; audio is passed as
+            an `audio_file` path or as inline `audio_data` (see _get_audio_data)
         """
 
-        def build_context(msg: Message):
-            ctx = {'client_name': 'mycroft_listener',
-                   'source': msg.context.get("source" or "speech_api"),
-                   'destination': ["skills"],
-                   "audio_parser_data": msg.context.get("audio_parser_data"),
-                   "client": msg.context.get("client"),
-                   # origin (local, klat, nano, mobile, api)
-                   "neon_should_respond": msg.context.get(
-                       "neon_should_respond"),
-                   "username": msg.context.get("username"),
-                   "timing": {"start": msg.data.get("time"),
-                              "transcribed": time.time()},
-                   "ident": msg.context.get("ident", time.time())
-                   }
-            if msg.context.get("klat_data"):
-                ctx["klat_data"] = msg.context("klat_data")
-                ctx["nick_profiles"] = msg.context.get("nick_profiles")
-            return ctx
-
         ident = message.context.get("ident") or "neon.audio_input.response"
-        wav_file_path = message.data.get("audio_file")
         lang = message.data.get("lang")
         try:
-            _, parser_data, transcriptions = self._get_stt_from_file(
-                wav_file_path, lang)
+            _, parser_data, transcriptions = self._get_stt_from_audio(
+                self._get_audio_data(message.data), lang)
             message.context["audio_parser_data"] = parser_data
-            context = build_context(message)
+            context = self._build_audio_input_context(message)
             data = {
                 "utterances": transcriptions,
                 "lang": message.data.get("lang", "en-us")
             }
             handled = True  # TODO
-            bus.emit(Message('recognizer_loop:utterance', data, context))
-            bus.emit(message.reply(ident, data={"parser_data": parser_data,
-                                                "transcripts": transcriptions,
-                                                "skills_recv": handled}))
+            self._emit(message,
+                       Message('recognizer_loop:utterance', data, context))
+            self._emit(message, message.reply(
+                ident, data={"parser_data": parser_data,
+                             "transcripts": transcriptions,
+                             "skills_recv": handled}))
         except Exception as e:
             LOG.error(e)
-            bus.emit(message.reply(ident, data={"error": repr(e)}))
+            self._emit(message,
+                       message.reply(ident, data={"error": repr(e)}))
+
+    def handle_audio_stream_start(self, message: Message):
+        """
+        Handles the start of remote audio input streamed over the messagebus.
+        :param message: Message with a `stream_id`, `lang` and the
+            `sample_rate` and `sample_width` of the PCM chunks to follow
+        """
+        stream_id = message.data.get("stream_id")
+        if not stream_id:
+            LOG.error(f"stream_id not specified: {message.data}")
+            return
+        ident = message.context.get("ident") or "neon.audio_input.response"
+        # register the stream right away so chunks are buffered while an
+        # engine is leased off the messagebus thread
+        with self._streams_lock:
+            if stream_id not in self._streams and \
+                    len(self._streams) >= self.max_streams:
+                LOG.warning(f"Rejecting stream {stream_id}: too many streams")
+                self.bus.emit(message.reply(ident, data={
+                    "error": "Too many audio streams"}))
+                return
+            self._streams[stream_id] = BusAudioStream(message,
+                                                      self.sample_rate)
+            if not self._expiry_scheduled:
+                self._expiry_scheduled = True
+                self._loop.call_soon_threadsafe(self._schedule_expiry)
+        self._start_stream(message)
+
+    def _start_audio_stream(self, message: Message):
+        """
+        Lease a streaming STT engine for a registered stream and start it
+        :param message: neon.audio_input.stream.start Message
+        """
+        stream_id = message.data.get("stream_id")
+        stream = self._streams.get(stream_id)
+        if not stream:
+            return
+        if not self.pool.can_stream:
+            # buffer audio and transcribe it on the pool when the stream
+            # stops, so no engine is held while the client is sending audio
+            stream.start()
+            return
+        # streaming engines are never lent by the RecognizerLoop, so this
+        # is an engine of the stream's own
+        stt = stt_registry.acquire(config)
+        try:
+            if not stream.start(stt):
+                # stream was stopped or expired while loading the engine
+                stt_registry.release(stt)
+        except Exception as e:
+            LOG.error(e)
+            with self._streams_lock:
+                if self._streams.get(stream_id) is stream:
+                    self._streams.pop(stream_id)
+            stream.close()
+            stt_registry.release(stt)
+
+    def handle_audio_stream_data(self, message: Message):
+        """
+        Handles a chunk of streamed remote audio input and emits an interim
+        transcript if the STT engine has updated it.
+        :param message: Message with a `stream_id`, PCM `audio_data` as base64
+            or bytes and an optional chunk `index`
+        """
+        stream_id = message.data.get("stream_id")
+        stream = self._streams.get(stream_id)
+        if not stream:
+            LOG.warning(f"Audio for unknown stream: {stream_id}")
+            return
+        chunk = message.data.get("audio_data") or b""
+        if isinstance(chunk, str):
+            chunk = b64decode(chunk)
+        try:
+            if stream.add_chunk(chunk, message.data.get("index")):
+                self.bus.emit(stream.message.reply(
+                    "neon.audio_input.stream.interim",
+                    {"stream_id": stream_id,
+                     "transcript": stream.transcript}))
+        except Exception as e:
+            LOG.error(e)
+
+    def handle_audio_stream_stop(self, message: Message):
+        """
+        Handles the end of streamed remote audio input. Emits the final
+        transcription as a recognizer_loop:utterance and a response like
+        neon.audio_input.
+        :param message: Message with a `stream_id` and optionally the total
+            number of `chunks` sent
+        """
+        stream_id = message.data.get("stream_id")
+        ident = message.context.get("ident") or "neon.audio_input.response"
+        with self._streams_lock:
+            stream = self._streams.pop(stream_id, None)
+        if not stream:
+            self._emit(message, message.reply(ident, data={
+                "error": f"{stream_id} Not found!"}))
+            return
+        try:
+            audio_data, transcriptions = stream.finish(
+                message.data.get("chunks"), self.stream_timeout)
+            if transcriptions is None:
+                _, parser_data, transcriptions = self._get_stt_from_audio(
+                    audio_data, stream.lang)
+            else:
+                _, parser_data = service.get_context(audio_data)
+            stream.message.context["audio_parser_data"] = parser_data
+            context = self._build_audio_input_context(stream.message)
+            data = {"utterances": transcriptions,
+                    "lang": stream.lang or "en-us"}
+            self._emit(message,
+                       Message('recognizer_loop:utterance', data, context))
+            self._emit(message, message.reply(
+                ident, data={"parser_data": parser_data,
+                             "transcripts": transcriptions,
+                             "skills_recv": True}))
+        except Exception as e:
+            LOG.error(e)
+            self._emit(message,
+                       message.reply(ident, data={"error": repr(e)}))
+        finally:
+            if stream.stt:
+                stt_registry.release(stream.stt)
+
+    def _schedule_expiry(self):
+        """
+        Check for inactive streams every half stream_timeout while any
+        streams are open; runs on the asyncio loop
+        """
+        def _check():
+            self._loop.run_in_executor(None, self._expire_streams)
+            with self._streams_lock:
+                self._expiry_scheduled = bool(self._streams)
+            if self._expiry_scheduled:
+                self._schedule_expiry()
+        self._loop.call_later(self.stream_timeout / 2, _check)
+
+    def _expire_streams(self):
+        """
+        Drop streams that have not received audio within stream_timeout
+        """
+        expiration = time.time() - self.stream_timeout
+        with self._streams_lock:
+            expired = [self._streams.pop(stream_id)
+                       for stream_id, stream in list(self._streams.items())
+                       if stream.last_activity < expiration]
+        for stream in expired:
+            LOG.warning(f"Dropping inactive audio stream: "
+                        f"{stream.message.data.get('stream_id')}")
+            stt = stream.close()
+            if stt:
+                stt_registry.release(stt)
+
+    @staticmethod
+    def _build_audio_input_context(msg: Message) -> dict:
+        """
+        Build context for a recognizer_loop:utterance from an audio input
+        :param msg: Message associated with the audio input request
+        :return: utterance context
+        """
+        ctx = {'client_name': 'mycroft_listener',
+               'source': msg.context.get("source" or "speech_api"),
+               'destination': ["skills"],
+               "audio_parser_data": msg.context.get("audio_parser_data"),
+               "client": msg.context.get("client"),
+               # origin (local, klat, nano, mobile, api)
+               "neon_should_respond": msg.context.get(
+                   "neon_should_respond"),
+               "username": msg.context.get("username"),
+               "timing": {"start": msg.data.get("time"),
+                          "transcribed": time.time()},
+               "ident": msg.context.get("ident", time.time())
+               }
+        if msg.context.get("klat_data"):
+            ctx["klat_data"] = msg.context.get("klat_data")
+            ctx["nick_profiles"] = msg.context.get("nick_profiles")
+        return ctx
 
     def _get_stt_from_file(self, wav_file: str, lang: str = "en-us") -> (
             AudioData, dict, list):
@@ -368,25 +909,86 @@ class ExternalSTTService:
         :param lang: language of passed audio
         :return: (AudioData of object, extracted context, transcriptions)
         """
-        segment = AudioSegment.from_file(wav_file)
-        audio_data = AudioData(segment.raw_data, segment.frame_rate,
-                               segment.sample_width)
-        audio_stream = get_audio_file_stream(wav_file)
-        with self.lock:
-            if self.stt.can_stream:
-                self.stt.stream_start(lang)
-                while True:
-                    try:
-                        data = audio_stream.read(1024)
-                        self.stt.stream_data(data)
-                    except EOFError:
-                        break
-                transcriptions = self.stt.stream_stop()
-            else:
-                transcriptions = self.stt.execute(audio_data, lang)
+        return self._get_stt_from_audio(
+            read_audio_file(wav_file, self.sample_rate), lang)
+
+    def _get_stt_from_audio(self, audio_data: AudioData,
+                            lang: str = "en-us") -> (AudioData, dict, list):
+        """
+        Performs STT and audio processing on the specified audio_data
+        :param audio_data: decoded audio to process
+        :param lang: language of passed audio
+        :return: (AudioData of object, extracted context, transcriptions)
+        """
+        cache_key = self._get_cache_key(audio_data, lang)
+        transcriptions = self._get_cached_transcriptions(cache_key)
+        if transcriptions is None:
+            # admitted by _handle_request, wait for a worker
+            transcriptions = self.pool.run(self._transcribe, audio_data, lang,
+                                           block=True)
+            self._cache_transcriptions(cache_key, transcriptions)
         audio, audio_context = service.get_context(audio_data)
         return audio, audio_context, transcriptions
 
+    def _get_cache_key(self, audio_data: AudioData,
+                       lang: str) -> Optional[str]:
+        """
+        Get the transcription cache key for the specified audio
+        :param audio_data: decoded audio
+        :param lang: language of passed audio
+        :return: cache key or None if caching is disabled
+        """
+        return self.cache.get_key(audio_data, lang) if self.cache else None
+
+    def _get_cached_transcriptions(self, cache_key: str) -> Optional[list]:
+        if not cache_key:
+            return None
+        transcriptions = self.cache.get(cache_key)
+        LOG.debug(f"STT cache {'hit' if transcriptions else 'miss'}: "
+                  f"{self.cache.stats}")
+        return transcriptions
+
+    def _cache_transcriptions(self, cache_key: str, transcriptions: list):
+        if cache_key:
+            self.cache.put(cache_key, transcriptions)
+
+    def _get_audio_data(self, item) -> AudioData:
+        """
+        Decodes audio passed in a request into AudioData
+        :param item: audio file path or dict with either an `audio_file` path
+            or `audio_data` as base64 or bytes. Inline audio may specify
+            `audio_format` ("pcm", "wav", "flac"...) and, for pcm,
+            `sample_rate`, `sample_width` and `channels`
+        :return: AudioData at the listener sample rate
+        """
+        if isinstance(item, str):
+            item = {"audio_file": item}
+        if item.get("audio_data"):
+            return decode_audio_data(item["audio_data"], self.sample_rate,
+                                     audio_format=item.get("audio_format"),
+                                     source_rate=item.get("sample_rate"),
+                                     source_width=item.get("sample_width"),
+                                     channels=item.get("channels", 1))
+        if item.get("audio_file"):
+            return read_audio_file(item["audio_file"], self.sample_rate)
+        raise ValueError("audio_file or audio_data not specified!")
+
+    @staticmethod
+    def _transcribe(stt, audio_data: AudioData, lang: str) -> list:
+        """
+        Runs STT on a pool worker with that worker's STT instance
+        :param stt: STT engine owned by the calling worker
+        :param audio_data: decoded audio to transcribe
+        :param lang: language of passed audio
+        :return: transcriptions
+        """
+        if stt.can_stream:
+            stt.stream_start(lang)
+            for chunk in iter_audio_chunks(audio_data, 1024):
+                stt.stream_data(chunk)
+            return stt.stream_stop()
+        return stt.execute(audio_data, lang)
+
 
 def main(speech_config=None):
     global bus
@@ -394,13 +996,14 @@ def main(speech_config=None):
     global config
     global service
     global external_stt
+    global init_start
 
     reset_sigint_handler()
     bus = get_mycroft_bus()  # Mycroft messagebus, see mycroft.messagebus
     config = speech_config or Configuration.get()
 
     # Register handlers on internal RecognizerLoop emitter
-    loop = RecognizerLoop(config)
+    loop = RecognizerLoop(bus)
     loop.on('recognizer_loop:utterance', handle_utterance)
     loop.on('recognizer_loop:speech.recognition.unknown', handle_unknown)
     loop.on('speak', handle_speak)
@@ -409,6 +1012,7 @@ def main(speech_config=None):
     loop.on('recognizer_loop:hotword', handle_hotword)
     loop.on('recognizer_loop:record_end', handle_record_end)
     loop.on('recognizer_loop:no_internet', handle_no_internet)
+    loop.on('recognizer_loop:mic_level', handle_mic_level)
 
     # Register handlers for events on main Mycroft messagebus
     bus.on('complete_intent_failure', handle_complete_intent_failure)
@@ -422,6 +1026,10 @@ def main(speech_config=None):
     bus.on('recognizer_loop:audio_output_end', handle_audio_end)
     bus.on('mycroft.stop', handle_stop)
 
+    bus.on('neon.speech.is_ready', handle_get_ready_status)
+    bus.on('neon.speech.get_queue_stats', handle_get_queue_stats)
+    bus.on('neon.speech.get_parser_stats', handle_get_parser_stats)
+
     # State Change Notifications
     bus.on("neon.wake_words_state", handle_wake_words_state)
 
@@ -432,9 +1040,15 @@ def main(speech_config=None):
     service.start()
     loop.bind(service)
 
+    # Load and warm up the STT engine the loop will lease before starting it,
+    # using the same configuration the loop loads
+    init_start = time.time()
+    stt_registry.prewarm(Configuration.get())
+    loop.once('recognizer_loop:ready', handle_loop_ready)
     create_daemon(loop.run)
 
     wait_for_exit_signal()
+    loop.shutdown()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,205 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2021 Neongecko.com Inc.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+# following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions
+#    and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions
+#    and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote
+#    products derived from this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+# USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import os
+from collections import OrderedDict
+from os.path import dirname, getmtime, getsize, isdir, join, splitext
+from queue import Queue, Empty, Full
+from threading import Thread
+
+from mycroft.util.log import LOG
+from pydub import AudioSegment
+
+
+class AudioArchiveWriter(Thread):
+    """
+    Saves audio (wake words, utterances) to disk from a background thread so
+    recording is never blocked by encoding or disk I/O. Files may be
+    compressed, are fsynced in batches and the oldest archived files in a
+    directory (including those saved by previous runs) are removed once the
+    directory exceeds `max_disk_mb`, so wake words and utterances don't
+    evict each other.
+    """
+    # file extension and pydub export args per format
+    FORMATS = {"wav": ("wav", {}),
+               "flac": ("flac", {}),
+               "opus": ("opus", {"codec": "libopus"})}
+
+    def __init__(self, config=None, directories=None):
+        """
+        Args:
+            config (dict): `listener.audio_archive` configuration
+            directories (list): archive directories to index at startup;
+                others are indexed when first written to
+        """
+        super().__init__(daemon=True, name="audio_archive")
+        config = config or {}
+        audio_format = config.get("format", "wav")
+        if audio_format not in self.FORMATS:
+            LOG.warning(f"Unsupported archive format: {audio_format}")
+            audio_format = "wav"
+        self.format = audio_format
+        self.fsync_batch = config.get("fsync_batch", 8)
+        # per-directory quota, 0 for unlimited
+        self.max_disk_size = config.get("max_disk_mb", 512) * 1024 * 1024
+        self.dropped = 0
+        self._queue = Queue(maxsize=config.get("queue_size", 32))
+        self._unsynced = []
+        self._files = {}  # directory: OrderedDict(path: size), oldest first
+        self._dir_size = {}  # directory: total size of files in _files
+        self._directories = [d for d in directories or [] if d]
+
+    def get_filename(self, filename):
+        """
+        Get the path audio saved to filename will actually be written to
+        Args:
+            filename (str): requested path, i.e. ending in .wav
+        Returns:
+            path with the extension of the archive format
+        """
+        return splitext(filename)[0] + "." + self.FORMATS[self.format][0]
+
+    def save(self, audio_data, filename):
+        """
+        Queue audio to be written without blocking
+        Args:
+            audio_data (AudioData): audio to save
+            filename (str): requested path, see get_filename
+        Returns:
+            path the audio will be written to, None if the queue is full
+        """
+        filename = self.get_filename(filename)
+        try:
+            self._queue.put_nowait((audio_data, filename))
+        except Full:
+            self.dropped += 1
+            LOG.warning(f"Audio archive queue full, dropping {filename}")
+            return None
+        return filename
+
+    def run(self):
+        for directory in self._directories:
+            self._index_dir(directory)
+        while True:
+            try:
+                # only wake up when idle to flush a partially filled batch
+                request = self._queue.get(
+                    timeout=1 if self._unsynced else None)
+            except Empty:
+                self._sync()
+                continue
+            if request is None:
+                break
+            audio_data, filename = request
+            try:
+                self._write(audio_data, filename)
+            except Exception as e:
+                LOG.error(f"Failed to save {filename}: {e}")
+            if len(self._unsynced) >= self.fsync_batch:
+                self._sync()
+        self._sync()
+
+    def stop(self):
+        """
+        Write any queued audio, then stop the writer thread. If the queue is
+        full the oldest request is dropped rather than blocking shutdown.
+        """
+        while True:
+            try:
+                self._queue.put_nowait(None)
+                return
+            except Full:
+                try:
+                    _, filename = self._queue.get_nowait()
+                    self.dropped += 1
+                    LOG.warning(f"Audio archive stopping, dropping {filename}")
+                except Empty:
+                    pass
+
+    def _write(self, audio_data, filename):
+        directory = dirname(filename)
+        if not isdir(directory):
+            os.makedirs(directory)
+        self._index_dir(directory)
+        if self.format == "wav":
+            with open(filename, "wb") as f:
+                f.write(audio_data.get_wav_data())
+        else:
+            segment = AudioSegment(data=audio_data.frame_data,
+                                   sample_width=audio_data.sample_width,
+                                   frame_rate=audio_data.sample_rate,
+                                   channels=1)
+            segment.export(filename, format=self.format,
+                           **self.FORMATS[self.format][1])
+        self._unsynced.append(filename)
+        self._add_file(filename, getsize(filename))
+        if self.max_disk_size:
+            self._evict(directory)
+
+    def _sync(self):
+        directories = set(dirname(f) for f in self._unsynced)
+        for path in self._unsynced + list(directories):
+            try:
+                fd = os.open(path, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+            except OSError as e:
+                LOG.debug(f"fsync failed for {path}: {e}")
+        self._unsynced = []
+
+    def _index_dir(self, directory):
+        # account for files archived by previous runs, oldest first
+        if directory in self._files:
+            return
+        files = []
+        if isdir(directory):
+            for f in os.listdir(directory):
+                path = join(directory, f)
+                if splitext(f)[1][1:] in self.FORMATS:
+                    files.append((getmtime(path), path, getsize(path)))
+        self._files[directory] = OrderedDict(
+            (path, size) for _, path, size in sorted(files))
+        self._dir_size[directory] = sum(size for _, _, size in files)
+        if self.max_disk_size:
+            self._evict(directory)
+
+    def _add_file(self, path, size):
+        directory = dirname(path)
+        files = self._files.setdefault(directory, OrderedDict())
+        self._dir_size[directory] = \
+            self._dir_size.get(directory, 0) + size - files.pop(path, 0)
+        files[path] = size
+
+    def _evict(self, directory):
+        files = self._files[directory]
+        while self._dir_size[directory] > self.max_disk_size and \
+                len(files) > 1:
+            path, size = files.popitem(last=False)
+            self._dir_size[directory] -= size
+            if path in self._unsynced:
+                self._unsynced.remove(path)
+            try:
+                os.remove(path)
+                LOG.debug(f"Removed archived audio: {path}")
+            except FileNotFoundError:
+                pass
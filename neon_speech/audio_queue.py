@@ -0,0 +1,130 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2021 Neongecko.com Inc.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+# following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions
+#    and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions
+#    and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote
+#    products derived from this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+# USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import time
+from queue import Queue
+
+from mycroft.client.speech.listener import AUDIO_DATA, STREAM_DATA
+from mycroft.util.log import LOG
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+
+
+class AudioQueue(Queue):
+    """
+    Bounded queue between the AudioProducer and AudioConsumer.
+    Once `max_size` items are queued new utterances are admitted according
+    to `policy` (drop the oldest queued utterance, or the new one), and
+    STREAM_DATA chunks are merged into the last queued chunk so streaming
+    audio is never lost. Stream control messages are always admitted.
+    Utterances are discarded by get once they have been queued for longer
+    than `max_age` seconds.
+    """
+    def __init__(self, config=None):
+        """
+        Args:
+            config (dict): `listener.audio_queue` configuration
+        """
+        super().__init__()
+        config = config or {}
+        self.max_size = config.get("max_size", 8)
+        self.policy = config.get("policy", DROP_OLDEST)
+        self.coalesce = config.get("coalesce_stream_data", False)
+        self.max_age = config.get("max_age", 15)
+        self.max_depth = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.stale = 0
+        # id(item): deadline of queued utterances, kept out of the item so
+        # the utterance context isn't modified
+        self._deadlines = {}
+
+    def put(self, item, block=True, timeout=None):
+        """
+        Queue an item without blocking, applying the overflow policy
+        Args:
+            item (tuple): (tag, data, context) or None
+        """
+        with self.mutex:
+            if not self._admit(item):
+                return
+            if item is not None and item[0] == AUDIO_DATA and self.max_age:
+                self._deadlines[id(item)] = time.time() + self.max_age
+            self._put(item)
+            self.unfinished_tasks += 1
+            self.max_depth = max(self.max_depth, self._qsize())
+            self.not_empty.notify()
+
+    def _admit(self, item):
+        """
+        Make room for item, called with the mutex held
+        Returns:
+            True if item should be appended to the queue
+        """
+        if item is None:
+            return True
+        tag = item[0]
+        if tag == STREAM_DATA and self.queue and \
+                self.queue[-1] is not None and \
+                self.queue[-1][0] == STREAM_DATA and \
+                (self.coalesce or self._qsize() >= self.max_size):
+            last = self.queue.pop()
+            self.queue.append((STREAM_DATA, last[1] + item[1], last[2]))
+            self.coalesced += 1
+            return False
+        if tag != AUDIO_DATA or self._qsize() < self.max_size:
+            return True
+        if self.policy == DROP_NEWEST:
+            self.dropped += 1
+            LOG.warning("Audio queue full, dropping new utterance")
+            return False
+        for queued in self.queue:
+            if queued is not None and queued[0] == AUDIO_DATA:
+                self.queue.remove(queued)
+                self._deadlines.pop(id(queued), None)
+                self.unfinished_tasks -= 1
+                self.dropped += 1
+                LOG.warning("Audio queue full, dropping oldest utterance")
+                break
+        return True
+
+    def get(self, block=True, timeout=None):
+        """
+        Get the next item, discarding utterances past their deadline.
+        NOTE: timeout restarts after each discarded utterance
+        """
+        while True:
+            item = super().get(block, timeout)
+            with self.mutex:
+                deadline = self._deadlines.pop(id(item), None)
+                if deadline is None or time.time() <= deadline:
+                    return item
+                self.stale += 1
+            LOG.warning("Discarding stale utterance")
+
+    @property
+    def stats(self):
+        return {"depth": self.qsize(),
+                "max_depth": self.max_depth,
+                "dropped": self.dropped,
+                "coalesced": self.coalesced,
+                "stale": self.stale}
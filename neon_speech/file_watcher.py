@@ -0,0 +1,202 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2021 Neongecko.com Inc.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+# following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions
+#    and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions
+#    and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote
+#    products derived from this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+# USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+from os.path import join
+from threading import Lock
+
+from mycroft.util.log import LOG
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+_WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM |
+               IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF |
+               IN_MOVE_SELF)
+# struct inotify_event: int wd; uint32 mask, cookie, len; char name[len]
+_EVENT = struct.Struct("iIII")
+
+
+def is_ignored_file(name):
+    """
+    Check if changes to a file should not trigger a module reload, i.e.
+    compiled python files, hidden files and settings.json
+    """
+    return name.startswith('.') or name.endswith(('.pyc', '.pyo')) or \
+        name in ('__pycache__', 'settings.json')
+
+
+class InotifyWatcher:
+    """
+    Recursively watches a directory tree with inotify (through ctypes, no
+    extra dependencies) and reports changed paths, debounced.
+    Only available on Linux, use InotifyWatcher.create to fall back
+    gracefully where it isn't supported.
+    """
+    def __init__(self, root):
+        """
+        Args:
+            root (str): directory to watch recursively
+        Raises:
+            OSError if inotify is not available
+        """
+        self.root = root
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6",
+                                 use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        self._watches = {}  # wd: path
+        self._lock = Lock()
+        self._waiting = False
+        self._closed = False
+        self._add_tree(root)
+
+    @classmethod
+    def create(cls, root):
+        """
+        Get an InotifyWatcher for root
+        Args:
+            root (str): directory to watch recursively
+        Returns:
+            InotifyWatcher or None if inotify is not available
+        """
+        try:
+            return cls(root)
+        except (OSError, AttributeError) as e:
+            LOG.warning(f"inotify not available: {e}")
+            return None
+
+    def _add_watch(self, path):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path),
+                                          _WATCH_MASK)
+        if wd < 0:
+            LOG.warning(f"Could not watch {path}: "
+                        f"{os.strerror(ctypes.get_errno())}")
+        else:
+            self._watches[wd] = path
+
+    def _add_tree(self, path):
+        for root_dir, dirs, _ in os.walk(path):
+            dirs[:] = [d for d in dirs if not is_ignored_file(d)]
+            self._add_watch(root_dir)
+
+    def _read_events(self):
+        changed = set()
+        while True:
+            try:
+                data = os.read(self._fd, 65536)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT.unpack_from(data, offset)
+                offset += _EVENT.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    # events were lost, report the whole tree as changed
+                    changed.add(self.root)
+                    continue
+                if mask & IN_IGNORED:
+                    self._watches.pop(wd, None)
+                    continue
+                path = self._watches.get(wd)
+                if path is None:
+                    continue
+                if name:
+                    name = os.fsdecode(name)
+                    if is_ignored_file(name):
+                        continue
+                    path = join(path, name)
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    self._add_tree(path)
+                changed.add(path)
+
+    def wait(self, debounce=0.5):
+        """
+        Block until something in the watched tree changes, then keep
+        collecting changes until none happen for `debounce` seconds
+        Args:
+            debounce (float): seconds without changes before returning
+        Returns:
+            set of changed paths, None if the watcher was closed
+        """
+        with self._lock:
+            if self._closed:
+                return None
+            self._waiting = True
+        changed = set()
+        timeout = None
+        try:
+            while True:
+                readable, _, _ = select.select([self._fd, self._wakeup_r],
+                                               [], [], timeout)
+                if self._wakeup_r in readable:
+                    return None
+                if not readable:
+                    return changed
+                changed.update(self._read_events())
+                if changed:
+                    timeout = debounce
+        finally:
+            with self._lock:
+                self._waiting = False
+                if self._closed:
+                    self._cleanup()
+
+    def close(self):
+        """
+        Stop watching and release the inotify fd; a thread blocked in wait
+        is woken and releases it on its way out.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self._waiting:
+                os.write(self._wakeup_w, b"\0")
+            else:
+                self._cleanup()
+
+    def _cleanup(self):
+        for fd in (self._fd, self._wakeup_r, self._wakeup_w):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
@@ -0,0 +1,293 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2021 Neongecko.com Inc.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+# following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions
+#    and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions
+#    and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote
+#    products derived from this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+# USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import time
+from queue import Queue, Empty
+from threading import Lock, Thread
+
+from mycroft.util.log import LOG
+
+_UPDATE = "update"
+_CHECK = "check"
+
+# hotword modes
+STREAMING = "streaming"  # engine gets every chunk, checks are a cheap poll
+BATCH = "batch"  # engine only checks a window of recent audio
+HYBRID = "hybrid"  # both
+
+
+class AudioWindow:
+    """
+    Reusable buffer for a window of audio shared by the workers checking it.
+    Returned to its WindowPool once every holder has released it.
+    """
+    def __init__(self, pool):
+        self.buffer = bytearray()
+        self.refs = 0
+        self._pool = pool
+
+    def retain(self):
+        self._pool.retain(self)
+
+    def release(self):
+        self._pool.release(self)
+
+
+class WindowPool:
+    """
+    Small pool of AudioWindows so wake word windows don't allocate a new
+    buffer for every check. A window is copied out of the rolling buffer
+    because it is read on the hotword threads while capture continues.
+    """
+    def __init__(self, max_free=4):
+        """
+        Args:
+            max_free (int): max released windows kept for reuse
+        """
+        self.max_free = max_free
+        self._free = []
+        self._lock = Lock()
+
+    def acquire(self):
+        """
+        Get a window held once by the caller
+        """
+        with self._lock:
+            window = self._free.pop() if self._free else AudioWindow(self)
+            window.refs = 1
+        return window
+
+    def retain(self, window):
+        with self._lock:
+            window.refs += 1
+
+    def release(self, window):
+        with self._lock:
+            window.refs -= 1
+            if window.refs == 0 and len(self._free) < self.max_free:
+                self._free.append(window)
+
+
+class HotwordWorker(Thread):
+    """
+    Runs a single hotword engine on its own thread, fed through a bounded
+    queue. At most one check is pending; a new check replaces it with the
+    newer window. When the queue is full the oldest update is dropped.
+    """
+    def __init__(self, name, hotword, detections, max_queue=32,
+                 check_interval=0.2, window=1.2):
+        """
+        Args:
+            name (str): hotword name
+            hotword (dict): loop.engines entry for this hotword
+            detections (Queue): queue to put the name of detected hotwords in
+            max_queue (int): max pending requests for this engine
+            check_interval (float): default seconds between checks
+            window (float): default seconds of audio to check
+        """
+        super().__init__(daemon=True, name=f"hotword_{name}")
+        self.hotword = name
+        self.engine = hotword["engine"]
+        self.wakeup = hotword.get("wakeup", False)
+        self.mode = hotword.get("mode") or HYBRID
+        self.check_interval = hotword.get("check_interval") or check_interval
+        self.window = hotword.get("window") or window
+        self.buffers_since_check = 0.0
+        self.detections = detections
+        self.queue = Queue(maxsize=max_queue)
+        self.dropped = 0
+        self.coalesced = 0
+
+    def put(self, request):
+        """
+        Queue a request without blocking
+        Args:
+            request (tuple): (action, audio, AudioWindow or None)
+        """
+        dropped = None
+        with self.queue.mutex:
+            queue = self.queue.queue
+            pending_check = None
+            if request[0] == _CHECK:
+                pending_check = next((i for i, r in enumerate(queue)
+                                      if r is not None and r[0] == _CHECK),
+                                     None)
+            if pending_check is not None:
+                # the newer window supersedes a check that hasn't run yet,
+                # keeping its place so checks aren't starved by updates
+                dropped = queue[pending_check]
+                queue[pending_check] = request
+                self.coalesced += 1
+            else:
+                if self.queue._qsize() >= self.queue.maxsize:
+                    pending = [r for r in queue if r is not None]
+                    dropped = next((r for r in pending if r[0] == _UPDATE),
+                                   pending[0] if pending else None)
+                    if dropped is not None:
+                        queue.remove(dropped)
+                        self.queue.unfinished_tasks -= 1
+                        self.dropped += 1
+                self.queue._put(request)
+                self.queue.unfinished_tasks += 1
+                self.queue.not_empty.notify()
+        if dropped is not None and dropped[2] is not None:
+            dropped[2].release()
+
+    def clear(self):
+        """Drop any pending requests."""
+        try:
+            while True:
+                request = self.queue.get_nowait()
+                if request is not None and request[2] is not None:
+                    request[2].release()
+        except Empty:
+            pass
+
+    def run(self):
+        while True:
+            request = self.queue.get()
+            if request is None:
+                break
+            action, audio, window = request
+            try:
+                if action == _UPDATE:
+                    self.engine.update(audio)
+                elif self.engine.found_wake_word(audio):
+                    self.detections.put(self.hotword)
+            except Exception as e:
+                LOG.error(f"Hotword engine {self.hotword} failed: {e}")
+            finally:
+                if window is not None:
+                    window.release()
+
+    def stop(self):
+        self.clear()
+        self.queue.put(None)
+
+
+class HotwordDetector:
+    """
+    Fans audio out to hotword engines running on their own threads and
+    collects their detections so audio capture is never blocked by a slow
+    engine.
+    """
+    def __init__(self, engines, max_queue=32, check_interval=0.2,
+                 window=1.2):
+        """
+        Args:
+            engines (dict): hotword name to loop.engines entry
+            max_queue (int): max pending requests per engine
+            check_interval (float): seconds between checks for engines that
+                don't configure `check_interval`
+            window (float): seconds of audio to check for engines that don't
+                configure `window`
+        """
+        self.detections = Queue()
+        self.windows = WindowPool()
+        self.workers = [HotwordWorker(name, hotword, self.detections,
+                                      max_queue, check_interval, window)
+                        for name, hotword in engines.items()]
+
+    def start(self):
+        for worker in self.workers:
+            worker.start()
+
+    def stop(self, timeout=5):
+        """
+        Stop the workers and wait for them to exit, so engines are no longer
+        in use and can be stopped once this returns
+        Args:
+            timeout (float): max seconds to wait for all workers
+        """
+        for worker in self.workers:
+            worker.stop()
+        deadline = time.time() + timeout
+        for worker in self.workers:
+            if worker.is_alive():
+                worker.join(max(0.0, deadline - time.time()))
+            if worker.is_alive():
+                LOG.warning(f"Hotword engine {worker.hotword} did not stop")
+
+    def feed(self, chunk):
+        """
+        Queue a sound chunk for engines that perform streaming predictions
+        """
+        for worker in self.workers:
+            if worker.mode != BATCH:
+                worker.put((_UPDATE, chunk, None))
+
+    def schedule_checks(self, get_window, sec_per_buffer):
+        """
+        Queue wake word checks for engines whose check interval has elapsed,
+        excluding sleep mode hotwords. Call once per chunk.
+        Args:
+            get_window (callable): get_window(seconds, buffer) fills the
+                bytearray buffer with the most recent `seconds` of audio,
+                called once per distinct window length
+            sec_per_buffer (float): seconds of audio in each chunk
+        """
+        windows = {}
+        for worker in self.workers:
+            if worker.wakeup:
+                continue
+            worker.buffers_since_check += 1.0
+            buffers_per_check = worker.check_interval / sec_per_buffer
+            if worker.buffers_since_check <= buffers_per_check:
+                continue
+            worker.buffers_since_check -= buffers_per_check
+            if worker.mode == STREAMING:
+                # engine tracks detections in update, no audio needed
+                worker.put((_CHECK, b"", None))
+                continue
+            window = windows.get(worker.window)
+            if window is None:
+                window = windows[worker.window] = self.windows.acquire()
+                get_window(worker.window, window.buffer)
+            window.retain()
+            worker.put((_CHECK, window.buffer, window))
+        for window in windows.values():
+            window.release()
+
+    def get_detections(self):
+        """
+        Get hotwords detected since the last call, without blocking
+        """
+        detected = []
+        try:
+            while True:
+                hotword = self.detections.get_nowait()
+                if hotword not in detected:
+                    detected.append(hotword)
+        except Empty:
+            pass
+        return detected
+
+    def reset(self):
+        """
+        Drop pending checks and detections, i.e. after handling a detection
+        """
+        for worker in self.workers:
+            worker.clear()
+        self.get_detections()
+
+    @property
+    def dropped(self):
+        return {worker.hotword: worker.dropped for worker in self.workers}
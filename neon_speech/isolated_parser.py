@@ -0,0 +1,243 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2021 Neongecko.com Inc.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+# following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions
+#    and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions
+#    and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote
+#    products derived from this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+# USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import multiprocessing
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from os.path import basename
+from threading import Lock
+
+from mycroft.util.log import LOG
+from speech_recognition import AudioData
+
+
+def _attach_shm(name):
+    """
+    Attach to a shared memory segment owned by the parent process without
+    registering it with the resource tracker. Spawned processes share the
+    parent's tracker, which already tracks the segment and unregisters it
+    when the parent unlinks it.
+    """
+    try:
+        return SharedMemory(name=name, track=False)
+    except TypeError:
+        # track was added in Python 3.13, the parser process is single
+        # threaded so registration can be skipped for the attach
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args: None
+        try:
+            return SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+def _run_parser(conn, module_descriptor, config):
+    """
+    Entrypoint of an isolated parser process. Loads the parser, then serves
+    hook calls received over conn with audio read from shared memory.
+    """
+    from neon_speech.plugins import AudioParser, AudioParsersService, \
+        ModuleLoaderService
+    path = module_descriptor["path"]
+    parser = ModuleLoaderService.load_module(module_descriptor,
+                                             basename(path), config=config)
+    if parser is None:
+        conn.send(("error", f"Failed to load {path}"))
+        return
+    overridden = [hook for hook in AudioParsersService.HOOKS
+                  if getattr(type(parser), hook, None) is not
+                  getattr(AudioParser, hook)]
+    conn.send(("ready", {"name": parser.name,
+                         "priority": parser.priority,
+                         "modifies_audio": getattr(parser, "modifies_audio",
+                                                   True),
+                         "config": getattr(parser, "config", {}),
+                         "overridden_hooks": overridden}))
+    shm = None
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+        hook, shm_name, length, sample_rate, sample_width = request
+        try:
+            if shm is None or shm.name != shm_name:
+                if shm is not None:
+                    shm.close()
+                shm = _attach_shm(shm_name)
+            audio_data = AudioData(bytes(shm.buf[:length]), sample_rate,
+                                   sample_width)
+            result = getattr(parser, hook)(audio_data)
+            if hook != "on_speech_end":
+                conn.send(("ok", None, None))
+                continue
+            new_audio, context = result
+            if new_audio is audio_data:
+                conn.send(("ok", None, context))
+                continue
+            data = new_audio.frame_data
+            audio = (len(data), new_audio.sample_rate, new_audio.sample_width)
+            if len(data) <= shm.size:
+                shm.buf[:len(data)] = data
+            else:
+                # doesn't fit in shared memory, send it through the pipe
+                audio = (data, new_audio.sample_rate, new_audio.sample_width)
+            conn.send(("ok", audio, context))
+        except Exception as e:
+            conn.send(("error", f"{hook} failed: {e}"))
+    try:
+        parser.default_shutdown()
+    finally:
+        if shm is not None:
+            shm.close()
+
+
+class IsolatedParser:
+    """
+    Proxy for an audio parser running in its own process so CPU bound
+    parsers don't compete with capture, hotword and STT threads for the GIL.
+    Audio is passed through shared memory and contexts through a pipe.
+    Hook calls block until the parser process replies, so isolated parsers
+    should run on parser worker threads (`audio_parsers.threaded`).
+    Isolated parsers are not bound to the messagebus.
+    """
+    def __init__(self, module_descriptor, config=None, shm_size=1024 * 1024,
+                 timeout=30):
+        """
+        Args:
+            module_descriptor (dict): descriptor of the module to load
+            config (dict): configuration passed to create_module
+            shm_size (int): initial size of the shared audio buffer in bytes
+            timeout (float): seconds to wait for the parser to load
+        Raises:
+            RuntimeError if the parser process fails to load the module
+        """
+        ctx = multiprocessing.get_context("spawn")
+        self._conn, child_conn = ctx.Pipe()
+        self._process = ctx.Process(target=_run_parser,
+                                    args=(child_conn, module_descriptor,
+                                          config),
+                                    daemon=True)
+        self._process.start()
+        child_conn.close()
+        self._lock = Lock()
+        self._shm = None
+        if not self._conn.poll(timeout):
+            self._stop_process()
+            raise RuntimeError("Timed out loading isolated parser")
+        status, data = self._conn.recv()
+        if status != "ready":
+            self._stop_process()
+            raise RuntimeError(data)
+        self.name = data["name"]
+        self.priority = data["priority"]
+        self.modifies_audio = data["modifies_audio"]
+        self.config = data["config"]
+        self.overridden_hooks = data["overridden_hooks"]
+        self.bus = None
+        self._shm = SharedMemory(create=True, size=shm_size)
+
+    @classmethod
+    def create(cls, module_descriptor, config=None):
+        """
+        Start an isolated parser process
+        Args:
+            module_descriptor (dict): descriptor of the module to load
+            config (dict): configuration passed to create_module
+        Returns:
+            IsolatedParser or None on failure
+        """
+        try:
+            return cls(module_descriptor, config)
+        except Exception as e:
+            LOG.error(f"Failed to start isolated parser "
+                      f"{module_descriptor['path']}: {e}")
+            return None
+
+    def _call(self, hook, audio_data):
+        data = audio_data.frame_data
+        with self._lock:
+            if len(data) > self._shm.size:
+                # grow the buffer, the parser process reopens it by name
+                size = max(len(data), 2 * self._shm.size)
+                self._shm.close()
+                self._shm.unlink()
+                self._shm = SharedMemory(create=True, size=size)
+            self._shm.buf[:len(data)] = data
+            try:
+                self._conn.send((hook, self._shm.name, len(data),
+                                 audio_data.sample_rate,
+                                 audio_data.sample_width))
+                reply = self._conn.recv()
+            except (EOFError, OSError) as e:
+                LOG.error(f"Isolated parser {self.name} exited: {e}")
+                return None
+            if reply[0] != "ok":
+                LOG.error(f"Isolated parser {self.name}: {reply[1]}")
+                return None
+            _, audio, context = reply
+            if audio is None:
+                return audio_data, context
+            data, sample_rate, sample_width = audio
+            if isinstance(data, int):
+                data = bytes(self._shm.buf[:data])
+            return AudioData(data, sample_rate, sample_width), context
+
+    def bind(self, bus):
+        """ the parser process has no messagebus connection """
+        self.bus = bus
+
+    def initialize(self):
+        """ the parser is initialized in its own process """
+        pass
+
+    def on_audio(self, audio_data):
+        self._call("on_audio", audio_data)
+
+    def on_hotword(self, audio_data):
+        self._call("on_hotword", audio_data)
+
+    def on_speech(self, audio_data):
+        self._call("on_speech", audio_data)
+
+    def on_speech_end(self, audio_data):
+        return self._call("on_speech_end", audio_data) or (audio_data, {})
+
+    def _stop_process(self):
+        try:
+            self._conn.send(None)
+        except (EOFError, OSError):
+            pass
+        self._process.join(5)
+        if self._process.is_alive():
+            self._process.terminate()
+        self._conn.close()
+
+    def default_shutdown(self):
+        """ stop the parser process and release shared memory """
+        with self._lock:
+            self._stop_process()
+            if self._shm is not None:
+                self._shm.close()
+                self._shm.unlink()
+                self._shm = None
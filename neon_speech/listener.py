@@ -20,9 +20,9 @@
 # USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 import time
-from queue import Queue, Empty
-from threading import Thread
-from time import sleep
+from queue import Queue
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from threading import Event, Thread, Lock
 
 import pyaudio
 from mycroft.client.speech.listener import AudioStreamHandler, \
@@ -33,9 +33,11 @@ from mycroft.client.speech.listener import AudioStreamHandler, \
 from mycroft.configuration import Configuration
 from mycroft.tts.cache import hash_sentence
 from mycroft.util.log import LOG
+from neon_speech.audio_queue import AudioQueue
 from neon_speech.hotword_factory import HotWordFactory
 from neon_speech.mic import MutableMicrophone, ResponsiveRecognizer
-from neon_speech.stt import STTFactory
+from neon_speech.sound_cues import SoundCuePlayer
+from neon_speech.stt import stt_registry
 from neon_speech.utils import find_input_device
 from ovos_utils.json_helper import merge_dict
 
@@ -111,6 +113,20 @@ class AudioConsumer(MycroftAudioConsumer):
         Thread.__init__(self)
         self.daemon = True
         self.loop = loop
+        self.lang_executor = ThreadPoolExecutor(
+            max_workers=self.loop.config.get("multilingual_workers", 3),
+            thread_name_prefix="multilingual_stt")
+        # non-streaming STT may transcribe several utterances concurrently,
+        # streaming STT is bound to this thread
+        self.stt_executor = None
+        workers = self.loop.config.get("stt_workers", 1)
+        if workers > 1 and not self.loop.stt.can_stream:
+            self.stt_executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="stt_consumer")
+        self._emit_lock = Lock()
+        self._dispatched = 0  # sequence number of the next utterance
+        self._emitted = 0  # sequence number of the next utterance to emit
+        self._finished = {}  # sequence number: payload or None
 
     @property
     def wakeup_engines(self):
@@ -121,22 +137,27 @@ class AudioConsumer(MycroftAudioConsumer):
     def run(self):
         while self.loop.state.running:
             self.read()
+        if self.stt_executor:
+            # finish pending utterances before the loop releases its STT
+            self.stt_executor.shutdown(wait=True)
+        # jobs still running after an early result hold multilingual engines
+        self.lang_executor.shutdown(wait=True)
 
     def read(self):
-        try:
-            message = self.loop.queue.get(timeout=0.5)
-        except Empty:
-            return
+        message = self.loop.queue.get()
 
         if message is None:
+            # sentinel queued by RecognizerLoop.stop
             return
 
         tag, data, context = message
-        lang = context.get("lang") or self.loop.stt.lang
+        lang = (context or {}).get("lang") or self.loop.stt.lang
         if tag == AUDIO_DATA:
             if data is not None:
                 if self.loop.state.sleeping:
                     self.wake_up(data)
+                elif self.stt_executor:
+                    self.dispatch(data, context)
                 else:
                     self.process(data, context)
         elif tag == STREAM_START:
@@ -157,8 +178,16 @@ class AudioConsumer(MycroftAudioConsumer):
                 break
 
     def _get_lang(self, context):
+        return self._get_langs(context)[0]
+
+    def _get_langs(self, context):
+        """
+        Get the primary STT language and any alternate languages to consider
+        :param context: audio context
+        :return: (primary language, list of alternate languages)
+        """
         user = context.get("user")
-        if self.chat_user_database:
+        if self.loop.chat_user_database:
             # TODO this needs to be revisited once a unified user db is
             #  introduced, right now this only comes from Klat, in the
             #  future mycroft will be locally aware of users and the same
@@ -172,19 +201,84 @@ class AudioConsumer(MycroftAudioConsumer):
             # context might contain language from wake-word or from some
             # audio module (eg, speaker identification)
             stt_language = context.get("lang")
-            alt_langs = None
-        return stt_language or self.loop.stt.lang
+            alt_langs = context.get("alt_langs")
+        stt_language = stt_language or self.loop.stt.lang
+        alt_langs = [lang for lang in alt_langs or []
+                     if lang.split('-')[0] != stt_language.split('-')[0]]
+        return stt_language, alt_langs
+
+    def dispatch(self, audio, context=None):
+        """
+        Transcribe audio on a worker thread. Utterances are emitted in the
+        order their audio was received.
+        :param audio: AudioData to transcribe
+        :param context: audio context
+        """
+        seq = self._dispatched
+        self._dispatched += 1
+        self.stt_executor.submit(self._process_ordered, seq, audio, context)
+
+    def _process_ordered(self, seq, audio, context):
+        payload = None
+        stt = self._lease_stt()
+        try:
+            payload = self.get_utterance_payload(audio, context, stt)
+        except Exception as e:
+            LOG.exception(e)
+        finally:
+            self._release_stt(stt)
+            with self._emit_lock:
+                self._finished[seq] = payload
+                # emit every utterance that is no longer waiting on an
+                # earlier one
+                while self._emitted in self._finished:
+                    payload = self._finished.pop(self._emitted)
+                    self._emitted += 1
+                    if payload:
+                        self.loop.emit("recognizer_loop:utterance", payload)
+
+    def _lease_stt(self):
+        if self.loop.stt_lock.acquire(blocking=False):
+            return self.loop.stt
+        return stt_registry.acquire(self.loop.config_core)
+
+    def _release_stt(self, stt):
+        if stt is self.loop.stt:
+            self.loop.stt_lock.release()
+        else:
+            stt_registry.release(stt)
 
     def process(self, audio, context=None):
+        # the loop's engine may be lent to the API while it is idle
+        with self.loop.stt_lock:
+            payload = self.get_utterance_payload(audio, context)
+        if payload:
+            self.loop.emit("recognizer_loop:utterance", payload)
+
+    def get_utterance_payload(self, audio, context=None, stt=None):
+        """
+        Transcribe audio and build a recognizer_loop:utterance payload
+        :param audio: AudioData to transcribe
+        :param context: audio context
+        :param stt: STT engine to use, defaults to the loop's engine
+        :return: utterance payload, None if nothing was transcribed
+        """
         if audio is None:
-            return
+            return None
         context = context or {}
         lang = context.get("lang") or self.loop.stt.lang
         heard_time = time.time()
         if self._audio_length(audio) < self.MIN_AUDIO_SIZE:
             LOG.warning("Audio too short to be processed")
         else:
-            transcription = self.transcribe(audio, lang)
+            alt_langs = None
+            if self.loop.multilingual_stt is not None:
+                lang, alt_langs = self._get_langs(context)
+            if alt_langs:
+                transcription, lang = \
+                    self.transcribe_multilingual(audio, lang, alt_langs)
+            else:
+                transcription = self.transcribe(audio, lang, stt)
             transcribed_time = time.time()
             if transcription:
                 ident = str(time.time()) + hash_sentence(transcription)
@@ -198,17 +292,19 @@ class AudioConsumer(MycroftAudioConsumer):
                     "timing": {"start": heard_time,
                                "transcribed": transcribed_time}
                 }
-                self.loop.emit("recognizer_loop:utterance", payload)
+                return payload
+        return None
 
     def send_stt_failure_event(self):
         """ Send message that nothing was transcribed. """
         if self.loop.use_wake_words:  # Don't capture ambient noise
             self.loop.emit('recognizer_loop:stt.recognition.unknown')
 
-    def transcribe(self, audio, lang=None):
+    def transcribe(self, audio, lang=None, stt=None):
+        stt = stt or self.loop.stt
         try:
             # Invoke the STT engine on the audio clip
-            text = self.loop.stt.execute(audio, language=lang) or ""
+            text = stt.execute(audio, language=lang) or ""
             if text:
                 LOG.debug("STT: " + text)
             else:
@@ -221,6 +317,62 @@ class AudioConsumer(MycroftAudioConsumer):
             LOG.error("Speech Recognition could not understand audio")
             return None
 
+    def transcribe_multilingual(self, audio, lang, alt_langs):
+        """
+        Transcribe audio in the primary and alternate languages concurrently
+        on the loop's multilingual engines. The first result with at least
+        `multilingual_confidence` is returned immediately and remaining jobs
+        are cancelled; otherwise the best scoring result is used. Engines may
+        return (text, confidence); plain transcripts score 1.0 in the primary
+        language and 0.5 in an alternate language.
+        NOTE: this is only useful with STT plugins that report confidence;
+        with plain string results the primary language always wins unless
+        its transcript is empty, at N times the STT cost.
+        :param audio: AudioData to transcribe
+        :param lang: primary language
+        :param alt_langs: alternate languages to try in parallel
+        :return: (transcription, language of transcription)
+        """
+        threshold = self.loop.config.get("multilingual_confidence", 0.9)
+        engines = self.loop.multilingual_stt
+
+        def _transcribe(language):
+            engine = engines.get()
+            try:
+                result = engine.execute(audio, language=language)
+            finally:
+                engines.put(engine)
+            if isinstance(result, (tuple, list)) and len(result) == 2:
+                text, confidence = result
+            else:
+                text = result
+                confidence = 1.0 if language == lang else 0.5
+            text = (text or "").strip()
+            return text, confidence if text else 0.0
+
+        futures = {self.lang_executor.submit(_transcribe, language): language
+                   for language in [lang] + alt_langs}
+        best = ("", 0.0, lang)
+        for future in as_completed(futures):
+            try:
+                text, confidence = future.result()
+            except Exception as e:
+                LOG.error(f"STT failed for {futures[future]}: {e}")
+                continue
+            if confidence > best[1]:
+                best = (text, confidence, futures[future])
+            if confidence >= threshold:
+                break
+        for future in futures:
+            future.cancel()
+        text, confidence, language = best
+        if text:
+            LOG.debug(f"STT ({language}, {confidence}): {text}")
+        else:
+            LOG.info('no words were transcribed')
+            self.send_stt_failure_event()
+        return text, language
+
 
 class RecognizerLoop(MycroftRecognizerLoop):
     """ EventEmitter loop running speech recognition.
@@ -232,12 +384,20 @@ class RecognizerLoop(MycroftRecognizerLoop):
         self.bus = bus
         self.engines = {}
         self.stt = None
+        # Queue of engines leased for multilingual STT, None if disabled
+        self.multilingual_stt = None
         self.fallback_stt = None
         self.queue = None
         self.audio_consumer = None
         self.audio_producer = None
         self.responsive_recognizer = None
         self.use_wake_words = True
+        self.hotword_timing = {}
+        self.sound_cues = None
+        self._config_changed = Event()
+        # held while self.stt is in use, other consumers may borrow the
+        # engine through stt_registry while it is free
+        self.stt_lock = Lock()
         try:
             from NGI.server.chat_user_database import KlatUserDatabase
             self.chat_user_database = KlatUserDatabase()
@@ -262,6 +422,14 @@ class RecognizerLoop(MycroftRecognizerLoop):
         self.microphone = MutableMicrophone(device_index, rate,
                                             mute=self.mute_calls > 0)
 
+        # cues are cached by name and survive config reloads
+        if self.sound_cues is None:
+            self.sound_cues = SoundCuePlayer()
+            self.sound_cues.start()
+        self.sound_cues.echo_tail = self.config.get("sound_cue_echo_tail",
+                                                    0.25)
+        self.sound_cues.direct_playback = \
+            self.config.get("sound_cue_direct_playback", False)
         self.create_hotword_engines()
         self.state = RecognizerLoopState()
         self.responsive_recognizer = ResponsiveRecognizer(self)
@@ -272,6 +440,7 @@ class RecognizerLoop(MycroftRecognizerLoop):
 
     def create_hotword_engines(self):
         LOG.info("creating hotword engines")
+        self.hotword_timing = {}
         hot_words = self.config_core.get("hotwords", {})
         for word in hot_words:
             try:
@@ -283,6 +452,11 @@ class RecognizerLoop(MycroftRecognizerLoop):
                 trigger = data.get("trigger", False)
                 lang = data.get("stt_lang", self.lang)
                 enabled = data.get("active", True)
+                # per engine check scheduling, defaults are set in
+                # ResponsiveRecognizer from the listener config
+                mode = data.get("mode")
+                check_interval = data.get("check_interval")
+                window = data.get("window")
                 if not enabled:
                     continue
                 engine = HotWordFactory.create_hotword(word,
@@ -298,29 +472,79 @@ class RecognizerLoop(MycroftRecognizerLoop):
                                           "utterance": utterance,
                                           "stt_lang": lang,
                                           "listen": listen,
-                                          "wakeup": wakeup}
+                                          "wakeup": wakeup,
+                                          "mode": mode,
+                                          "check_interval": check_interval,
+                                          "window": window}
+                    self.hotword_timing[word] = self.warm_up_hotword(engine)
+                    if sound:
+                        self.sound_cues.preload(sound)
             except Exception as e:
                 LOG.error("Failed to load hotword: " + word)
 
+    def warm_up_hotword(self, engine) -> float:
+        """
+        Prime a hotword engine with a silent chunk so first detection doesn't
+        pay for lazy initialization
+        :param engine: HotWordEngine to prime
+        :return: seconds spent priming the engine
+        """
+        start = time.time()
+        silence = bytes(int(self.config.get("sample_rate", 16000)) * 2)
+        try:
+            engine.update(silence)
+            engine.found_wake_word(silence)
+        except Exception as e:
+            LOG.warning(f"Hotword warm up failed: {e}")
+        return time.time() - start
+
     def start_async(self):
         """Start consumer and producer threads."""
         self.state.running = True
-        self.stt = STTFactory.create()
-        self.queue = Queue()
+        self.stt = stt_registry.acquire(self.config_core)
+        if self.config.get("multilingual_stt"):
+            # one engine per concurrent language, warmed up front rather
+            # than per utterance. Leased before self.stt is shared so they
+            # are never the loop's own engine.
+            self.multilingual_stt = Queue()
+            for _ in range(self.config.get("multilingual_workers", 3)):
+                self.multilingual_stt.put(
+                    stt_registry.acquire(self.config_core))
+        if not self.stt.can_stream:
+            # streaming engines keep state between messages, don't lend them
+            stt_registry.share(self.stt, self.stt_lock, self.config_core)
+        self.queue = AudioQueue(self.config.get("audio_queue", {}))
         self.audio_consumer = AudioConsumer(self)
         self.audio_consumer.start()
         self.audio_producer = AudioProducer(self)
         self.audio_producer.start()
 
     def stop(self):
+        """Stop threads started by start_async, even if it failed."""
         self.state.running = False
-        self.audio_producer.stop()
+        if self.audio_producer is not None:
+            self.audio_producer.stop()
         # stop wake word detectors
         for ww, hotword in self.engines.items():
             hotword["engine"].stop()
         # wait for threads to shutdown
-        self.audio_producer.join()
-        self.audio_consumer.join()
+        if self.audio_producer is not None:
+            self.audio_producer.join()
+            self.audio_producer = None
+        if self.audio_consumer is not None:
+            self.queue.put(None)
+            self.audio_consumer.join()
+            self.audio_consumer = None
+        if self.multilingual_stt is not None:
+            while not self.multilingual_stt.empty():
+                stt_registry.release(self.multilingual_stt.get())
+            self.multilingual_stt = None
+        if self.stt is not None:
+            # keep the engine warm for reuse after a reload
+            with self.stt_lock:
+                stt_registry.unshare(self.stt)
+            stt_registry.release(self.stt)
+            self.stt = None
 
     def run(self):
         """Start and reload mic and STT handling threads as needed.
@@ -333,11 +557,18 @@ class RecognizerLoop(MycroftRecognizerLoop):
             LOG.exception('Starting producer/consumer threads for listener '
                           'failed.')
             return
+        self.emit("recognizer_loop:ready")
+
+        if self.bus is not None:
+            self.bus.on("configuration.updated", self._on_config_updated)
 
         # Handle reload of consumer / producer if config changes
         while self.state.running:
             try:
-                sleep(5)
+                self._config_changed.wait()
+                self._config_changed.clear()
+                if not self.state.running:
+                    break
                 current_hash = recognizer_conf_hash(
                     Configuration.load_config_stack())
                 if current_hash != self._config_hash:
@@ -351,6 +582,16 @@ class RecognizerLoop(MycroftRecognizerLoop):
             except Exception:
                 LOG.exception('Exception in RecognizerLoop')
 
+    def _on_config_updated(self, message=None):
+        self._config_changed.set()
+
+    def shutdown(self):
+        """Stop consumer and producer threads and exit run()."""
+        self.stop()
+        self._config_changed.set()
+        if self.bus is not None:
+            self.bus.remove("configuration.updated", self._on_config_updated)
+
     def reload(self):
         """Reload configuration and restart consumer and producer."""
         self.stop()
@@ -19,21 +19,71 @@
 # WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
 # USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+from datetime import datetime
 from os.path import join
+from threading import Event, Thread
 from time import time as get_time
 
 from mycroft.audio import is_speaking, wait_while_speaking
 from mycroft.client.speech.hotword_factory import HotWordEngine
 from mycroft.client.speech.mic import get_silence, \
     ResponsiveRecognizer as MycroftResponsiveRecognizer, MutableMicrophone
-from mycroft.util import play_ogg, play_wav, play_mp3, resolve_resource_file
 from mycroft.util.log import LOG
+from neon_speech.audio_archive import AudioArchiveWriter
+from neon_speech.hotword_detector import HotwordDetector
+from neon_speech.utils import RollingAudioBuffer, SignalStats
 from speech_recognition import (
     AudioSource,
     AudioData
 )
 
 
+class MicLevelMeter(Thread):
+    """
+    Publishes microphone levels at a fixed rate from a background thread so
+    the audio capture thread never performs file I/O.
+    """
+    def __init__(self, recognizer, rate=10, write_file=True, emit=False):
+        """
+        Args:
+            recognizer (ResponsiveRecognizer): recognizer to read levels from
+            rate (float): max publish rate in Hz
+            write_file (bool): write levels to the ipc mic_level file
+            emit (bool): emit levels as recognizer_loop:mic_level events
+        """
+        super().__init__(daemon=True)
+        self.recognizer = recognizer
+        self.interval = 1.0 / rate
+        self.write_file = write_file
+        self.emit = emit
+        self.level = None  # (energy, threshold) set by the capture thread
+        self._stopped = Event()
+
+    def run(self):
+        published = None
+        while not self._stopped.wait(self.interval):
+            level = self.level
+            if level is None or level == published:
+                continue
+            published = level
+            energy, threshold = level
+            if self.write_file:
+                try:
+                    with open(self.recognizer.mic_level_file, 'w') as f:
+                        f.write("Energy:  cur=" + str(energy) + " thresh=" +
+                                str(threshold))
+                except Exception as e:
+                    LOG.warning("Could not save mic level to ipc directory")
+                    LOG.error(e)
+            if self.emit:
+                self.recognizer.loop.emit("recognizer_loop:mic_level",
+                                          {"energy": energy,
+                                           "threshold": threshold})
+
+    def stop(self):
+        self._stopped.set()
+
+
 class ResponsiveRecognizer(MycroftResponsiveRecognizer):
     def __init__(self, loop, *args, **kwargs):
         self.loop = loop
@@ -66,28 +116,62 @@ class ResponsiveRecognizer(MycroftResponsiveRecognizer):
 
         self.listen_requested = False
         self.audio_consumers = None
+        # stats of the most recently read chunk and rolling stats while
+        # waiting for a wake word
+        self.chunk_stats = None
+        self.signal_stats = None
+        self._last_chunk = None
+
+        # hotword engines run on their own threads
+        self.hotword_detector = HotwordDetector(
+            self.loop.engines, listener_config.get("hotword_queue_size", 32),
+            self.sec_between_ww_checks, self.test_ww_sec)
+        self.hotword_detector.start()
+
+        # wake words and utterances are saved from a background thread
+        self.audio_archive = None
+        if self.save_wake_words or self.save_utterances:
+            self.audio_archive = AudioArchiveWriter(
+                listener_config.get("audio_archive", {}),
+                [self.saved_wake_words_dir if self.save_wake_words else None,
+                 self.saved_utterances_dir if self.save_utterances else None])
+            self.audio_archive.start()
+
+        # Periodically output energy level stats.  This can be used to
+        # visualize the microphone input, e.g. a needle on a meter.
+        meter_config = listener_config.get("mic_meter", {})
+        self.mic_meter = None
+        if meter_config.get("rate", 10):
+            self.mic_meter = MicLevelMeter(self, meter_config.get("rate", 10),
+                                           meter_config.get("file", True),
+                                           meter_config.get("bus", False))
+            self.mic_meter.start()
 
     def bind(self, audio_consumers):
         self.audio_consumers = audio_consumers
 
+    def stop(self):
+        super().stop()
+        self.hotword_detector.stop()
+        if self.mic_meter:
+            self.mic_meter.stop()
+        if self.audio_archive:
+            self.audio_archive.stop()
+
     def feed_hotwords(self, chunk):
         """ feed sound chunk to hotword engines that perform
          streaming predictions (eg, precise) """
-        for ww, hotword in self.loop.engines.items():
-            hotword["engine"].update(chunk)
+        self.hotword_detector.feed(chunk)
 
     @staticmethod
     def sec_to_bytes(sec, source):
         return int(sec * source.SAMPLE_RATE) * source.SAMPLE_WIDTH
 
-    def check_for_hotwords(self, audio_data):
-        # check hot word
-        for ww, hotword in self.loop.engines.items():
-            if hotword.get("wakeup"):
-                # ignore sleep mode hotword
-                continue
-            if hotword["engine"].found_wake_word(audio_data):
-                yield ww
+    def check_for_hotwords(self, get_window, sec_per_buffer):
+        """ queue hot word checks for engines that are due for one,
+        detections are collected asynchronously by hotword_detector
+        (sleep mode hotwords are ignored) """
+        self.hotword_detector.schedule_checks(get_window, sec_per_buffer)
 
     def trigger_listen(self):
         """Externally trigger listening."""
@@ -96,10 +180,28 @@ class ResponsiveRecognizer(MycroftResponsiveRecognizer):
 
     def record_sound_chunk(self, source):
         chunk = source.stream.read(source.CHUNK, self.overflow_exc)
+        if self.loop.sound_cues and self.loop.sound_cues.is_muted:
+            # suppress echo of a sound cue without pausing capture
+            chunk = bytes(len(chunk))
+        self._last_chunk = chunk
+        self.chunk_stats = SignalStats.measure(chunk, source.SAMPLE_WIDTH)
         self.audio_consumers.feed_speech(self._create_audio_data(chunk,
-                                                             source))
+                                                                 source))
         return chunk
 
+    def calc_energy(self, sound_chunk, sample_width):
+        """Get the RMS of a chunk, reusing stats of the last chunk read."""
+        if sound_chunk is self._last_chunk and self.chunk_stats:
+            return self.chunk_stats.rms
+        return SignalStats.measure(sound_chunk, sample_width).rms
+
+    def _create_audio_data(self, raw_data, source):
+        audio_data = super()._create_audio_data(raw_data, source)
+        if raw_data is self._last_chunk:
+            # expose chunk stats to audio parsers
+            audio_data.stats = self.chunk_stats
+        return audio_data
+
     def _skip_wake_word(self):
         """Check if told programatically to skip the wake word
 
@@ -132,149 +234,115 @@ class ResponsiveRecognizer(MycroftResponsiveRecognizer):
 
         silence = get_silence(num_silent_bytes)
 
-        # bytearray to store audio in
-        byte_data = silence
+        # Max bytes for byte_data before audio is removed from the front
+        # every hotword window must fit in this buffer
+        max_size = self.sec_to_bytes(
+            max([self.saved_ww_sec] +
+                [w.window for w in self.hotword_detector.workers]), source)
 
-        buffers_per_check = self.sec_between_ww_checks / sec_per_buffer
-        buffers_since_check = 0.0
+        # rolling buffer to store audio in
+        byte_data = RollingAudioBuffer(max_size, silence)
 
-        # Max bytes for byte_data before audio is removed from the front
-        max_size = self.sec_to_bytes(self.saved_ww_sec, source)
-        test_size = self.sec_to_bytes(self.test_ww_sec, source)
+        def get_window(seconds, window):
+            # most recent audio followed by silence, copied into a pooled
+            # buffer since it is checked on the hotword threads
+            window[:] = byte_data.tail(self.sec_to_bytes(seconds, source))
+            window += silence
 
         said_wake_word = False
+        # discard checks queued while not waiting for a wake word
+        self.hotword_detector.reset()
 
-        # Rolling buffer to track the audio energy (loudness) heard on
+        # Rolling stats to track the audio energy (loudness) heard on
         # the source recently.  An average audio energy is maintained
         # based on these levels.
-        energies = []
-        idx_energy = 0
-        avg_energy = 0.0
         energy_avg_samples = int(5 / sec_per_buffer)  # avg over last 5 secs
-        counter = 0
-        end_seconds = 0
+        self.signal_stats = SignalStats(energy_avg_samples)
         while not said_wake_word and not self._stop_signaled:
             if self._skip_wake_word():
-                return byte_data, self.config.get("lang", "en-us")
+                return bytes(byte_data.tail()), \
+                    self.config.get("lang", "en-us")
             chunk = self.record_sound_chunk(source)
             self.audio_consumers.feed_audio(self._create_audio_data(chunk,
                                                                     source))
-            energy = self.calc_energy(chunk, source.SAMPLE_WIDTH)
+            energy = self.chunk_stats.rms
             if energy < self.energy_threshold * self.multiplier:
                 self._adjust_threshold(energy, sec_per_buffer)
 
-            if len(energies) < energy_avg_samples:
-                # build the average
-                energies.append(energy)
-                avg_energy += float(energy) / energy_avg_samples
-            else:
-                # maintain the running average and rolling buffer
-                avg_energy -= float(energies[idx_energy]) / energy_avg_samples
-                avg_energy += float(energy) / energy_avg_samples
-                energies[idx_energy] = energy
-                idx_energy = (idx_energy + 1) % energy_avg_samples
-
+            was_full = self.signal_stats.full
+            self.signal_stats.add(self.chunk_stats)
+            if was_full:
                 # maintain the threshold using average
-                if energy < avg_energy * 1.5:
+                if energy < self.signal_stats.avg_rms * 1.5:
                     if energy > self.energy_threshold:
                         # bump the threshold to just above this value
                         self.energy_threshold = energy * 1.2
 
-            # Periodically output energy level stats.  This can be used to
-            # visualize the microphone input, e.g. a needle on a meter.
-            if counter % 3:
-                try:
-                    with open(self.mic_level_file, 'w') as f:
-                        f.write("Energy:  cur=" + str(energy) + " thresh=" +
-                                str(self.energy_threshold))
-                except Exception as e:
-                    LOG.warning("Could not save mic level to ipc directory")
-                    LOG.error(e)
-            counter += 1
+            if self.mic_meter:
+                self.mic_meter.level = (energy, self.energy_threshold)
 
-            # At first, the buffer is empty and must fill up.  After that
-            # just drop the first chunk bytes to keep it the same size.
-            needs_to_grow = len(byte_data) < max_size
-            if needs_to_grow:
-                byte_data += chunk
-            else:  # Remove beginning of audio and add new chunk to end
-                byte_data = byte_data[len(chunk):] + chunk
+            # Oldest audio is dropped once the buffer reaches max_size
+            byte_data.write(chunk)
 
-            buffers_since_check += 1.0
             self.feed_hotwords(chunk)
-            if buffers_since_check > buffers_per_check:
-                end_seconds += self.sec_between_ww_checks
-                buffers_since_check -= buffers_per_check
-                chopped = byte_data[-test_size:] \
-                    if test_size < len(byte_data) else byte_data
-                audio_data = chopped + silence
-                said_hot_word = False
-                for hotword in self.check_for_hotwords(audio_data):
-                    said_hot_word = True
-                    engine = self.loop.engines[hotword]["engine"]
-                    sound = self.loop.engines[hotword]["sound"]
-                    utterance = self.loop.engines[hotword]["utterance"]
-                    listen = self.loop.engines[hotword]["listen"]
-                    stt_lang = self.loop.engines[hotword]["stt_lang"]
-                    LOG.info("Hot Word: " + hotword)
-                    # If enabled, play a wave file with a short sound to audibly
-                    # indicate hotword was detected.
-                    if sound:
-                        try:
-                            audio_file = resolve_resource_file(sound)
-                            if audio_file:
-                                source.mute()
-                                if audio_file.endswith(".wav"):
-                                    play_wav(audio_file).wait()
-                                elif audio_file.endswith(".mp3"):
-                                    play_mp3(audio_file).wait()
-                                elif audio_file.endswith(".ogg"):
-                                    play_ogg(audio_file).wait()
-                                source.unmute()
-                            else:
-                                LOG.error(f"could not find audio file: {sound}")
-                        except Exception as e:
-                            LOG.warning(e)
-
-                    # Hot Word succeeded
+            self.check_for_hotwords(get_window, sec_per_buffer)
+
+            said_hot_word = False
+            for hotword in self.hotword_detector.get_detections():
+                said_hot_word = True
+                engine = self.loop.engines[hotword]["engine"]
+                sound = self.loop.engines[hotword]["sound"]
+                utterance = self.loop.engines[hotword]["utterance"]
+                listen = self.loop.engines[hotword]["listen"]
+                stt_lang = self.loop.engines[hotword]["stt_lang"]
+                LOG.info("Hot Word: " + hotword)
+                # If enabled, play a wave file with a short sound to audibly
+                # indicate hotword was detected.
+                if sound:
+                    self.loop.sound_cues.play(sound)
+
+                # Hot Word succeeded
+                payload = {
+                    'hotword': hotword,
+                    'start_listening': listen,
+                    'sound': sound,
+                    'utterance': utterance,
+                    'stt_lang': stt_lang,
+                    "engine": engine.__class__.__name__
+                }
+
+                if self.save_wake_words:
+                    filename = join(self.saved_wake_words_dir,
+                                    hotword + "_" + str(
+                                        get_time()) + ".wav")
+                    LOG.info("Saving wake word locally: " + filename)
+                    payload["filename"] = self.audio_archive.save(
+                        self._create_audio_data(bytes(byte_data.tail()),
+                                                source), filename)
+
+                self.loop.emit("recognizer_loop:hotword", payload)
+
+                if utterance:
+                    LOG.debug("Hotword utterance: " + utterance)
+                    # send the transcribed word on for processing
                     payload = {
-                        'hotword': hotword,
-                        'start_listening': listen,
-                        'sound': sound,
-                        'utterance': utterance,
-                        'stt_lang': stt_lang,
-                        "engine": engine.__class__.__name__
+                        'utterances': [utterance],
+                        "lang": stt_lang
                     }
+                    self.loop.emit("recognizer_loop:utterance", payload)
+
+                if listen:
+                    self.hotword_detector.reset()
+                    return bytes(byte_data.tail()), stt_lang
 
-                    if self.save_wake_words:
-                        filename = join(self.saved_wake_words_dir,
-                                        hotword + "_" + str(
-                                            get_time()) + ".wav")
-                        payload["filename"] = filename
-                        LOG.info("Saving wake word locally: " + filename)
-                        # Save wake word locally
-                        # TODO
-
-                    self.loop.emit("recognizer_loop:hotword", payload)
-
-                    if utterance:
-                        LOG.debug("Hotword utterance: " + utterance)
-                        # send the transcribed word on for processing
-                        payload = {
-                            'utterances': [utterance],
-                            "lang": stt_lang
-                        }
-                        self.loop.emit("recognizer_loop:utterance", payload)
-
-                    if listen:
-                        return byte_data, stt_lang
-
-                if said_hot_word:
-                    self.audio_consumers.feed_hotword(
-                        self._create_audio_data(byte_data, source))
-                    # reset bytearray to store wake word audio in, else many
-                    # serial detections
-                    byte_data = silence
+            if said_hot_word:
+                self.audio_consumers.feed_hotword(
+                    self._create_audio_data(bytes(byte_data.tail()),
+                                            source))
+                # reset buffer to store wake word audio in, else many
+                # serial detections
+                byte_data.clear(silence)
+                self.hotword_detector.reset()
 
     def listen(self, source, stream):
         """Listens for chunks of audio that Mycroft should perform STT on.
@@ -368,10 +436,10 @@ class ResponsiveRecognizer(MycroftResponsiveRecognizer):
         self.loop.emit("recognizer_loop:record_end")
         if self.save_utterances:
             LOG.info("Recording utterance")
-            stamp = str(datetime.datetime.now())
-            filename = join(self.saved_utterances_dir, f"utterance{stamp}.wav")
-            with open(filename, 'wb') as filea:
-                filea.write(audio_data.get_wav_data())
+            stamp = str(datetime.now())
+            filename = self.audio_archive.save(
+                audio_data,
+                join(self.saved_utterances_dir, f"utterance{stamp}.wav"))
             LOG.debug("Thinking...")
         else:
             filename = None
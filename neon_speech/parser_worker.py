@@ -0,0 +1,141 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2021 Neongecko.com Inc.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+# following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions
+#    and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions
+#    and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote
+#    products derived from this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+# USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import time
+from collections import deque
+from concurrent.futures import Future
+from threading import Condition, Thread
+
+from mycroft.util.log import LOG
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+
+
+class ParserWorker(Thread):
+    """
+    Runs the hooks of a single audio parser on its own thread so a slow
+    parser never blocks audio capture. Audio chunks are fed through a bounded
+    queue; when it is full a chunk is dropped according to `policy`.
+    Hotwords and on_speech_end calls are never dropped.
+    """
+    def __init__(self, parser, max_queue=64, policy=DROP_OLDEST):
+        """
+        Args:
+            parser (AudioParser): parser to run hooks of
+            max_queue (int): max queued audio chunks
+            policy (str): drop_oldest or drop_newest chunk when full
+        """
+        super().__init__(daemon=True, name=f"parser_{parser.name}")
+        self.parser = parser
+        self.max_queue = max_queue
+        self.policy = policy
+        self.dropped = 0
+        self.latency = {}  # hook: [count, total seconds, max seconds]
+        self._queue = deque()  # (hook, audio_data, enqueued, future)
+        self._chunks = 0  # droppable requests in _queue
+        self._cond = Condition()
+        self._running = True
+
+    def put(self, hook, audio_data):
+        """
+        Queue an audio chunk for `hook` without blocking
+        Args:
+            hook (str): on_audio or on_speech
+            audio_data (AudioData): audio chunk
+        """
+        with self._cond:
+            if self._chunks >= self.max_queue:
+                self.dropped += 1
+                if self.policy == DROP_NEWEST:
+                    return
+                for request in self._queue:
+                    if request[3] is None and request[0] != "on_hotword":
+                        self._queue.remove(request)
+                        self._chunks -= 1
+                        break
+            self._queue.append((hook, audio_data, time.time(), None))
+            if hook != "on_hotword":
+                self._chunks += 1
+            self._cond.notify()
+
+    def call(self, hook, audio_data):
+        """
+        Queue a call to `hook` after any pending chunks
+        Args:
+            hook (str): parser method to call
+            audio_data (AudioData): audio to pass to hook
+        Returns:
+            Future resolving to the return value of hook
+        """
+        future = Future()
+        with self._cond:
+            self._queue.append((hook, audio_data, time.time(), future))
+            self._cond.notify()
+        return future
+
+    def run(self):
+        while True:
+            with self._cond:
+                while self._running and not self._queue:
+                    self._cond.wait()
+                if not self._running:
+                    break
+                hook, audio_data, enqueued, future = self._queue.popleft()
+                if future is None and hook != "on_hotword":
+                    self._chunks -= 1
+            if future is not None and not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = getattr(self.parser, hook)(audio_data)
+                if future is not None:
+                    future.set_result(result)
+            except Exception as e:
+                if future is not None:
+                    future.set_exception(e)
+                else:
+                    LOG.error(f"{self.parser.name}.{hook} failed: {e}")
+            self._record_latency(hook, time.time() - enqueued)
+
+    def _record_latency(self, hook, latency):
+        count, total, maximum = self.latency.get(hook, (0, 0.0, 0.0))
+        self.latency[hook] = [count + 1, total + latency,
+                              max(maximum, latency)]
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            for request in self._queue:
+                if request[3] is not None:
+                    request[3].cancel()
+            self._queue.clear()
+            self._chunks = 0
+            self._cond.notify()
+
+    @property
+    def stats(self):
+        return {"queued": len(self._queue),
+                "dropped": self.dropped,
+                "latency": {hook: {"count": count,
+                                   "avg": total / count,
+                                   "max": maximum}
+                            for hook, (count, total, maximum)
+                            in list(self.latency.items())}}
@@ -20,18 +20,23 @@
 # USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 import os
-import time
 import sys
+import time
 import gc
 import imp
 import pkg_resources
 
-from os.path import join, dirname, basename
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from functools import partial
+from os.path import join, dirname, basename, isdir, relpath
 from glob import glob
 from speech_recognition import AudioData
 from threading import Thread, Event
 from ovos_utils.json_helper import merge_dict
 from mycroft.util.log import LOG
+from neon_speech.file_watcher import InotifyWatcher, is_ignored_file
+from neon_speech.isolated_parser import IsolatedParser
+from neon_speech.parser_worker import ParserWorker
 
 
 DEBUG = True
@@ -86,6 +91,14 @@ class ModuleLoaderService(Thread):
         self.bus = bus
         self.modules_dir = modules_dir
         self.blacklist = []
+        # reload modules when they change on disk, watching with inotify
+        # where available and otherwise polling every poll_interval seconds
+        # (0 disables polling)
+        self.hot_reload = True
+        self.poll_interval = 1
+        self.reload_debounce = 0.5
+        self._watcher = None
+        self._modules = ()
 
     @staticmethod
     def _get_last_modified_date(path):
@@ -103,8 +116,7 @@ class ModuleLoaderService(Thread):
         for root_dir, dirs, files in os.walk(path):
             dirs[:] = [d for d in dirs if not d.startswith('.')]
             for f in files:
-                if (not f.endswith('.pyc') and f != 'settings.json' and
-                        not f.startswith('.')):
+                if not is_ignored_file(f):
                     all_files.append(join(root_dir, f))
         # check files of interest in the skill root directory
         return max(os.path.getmtime(f) for f in all_files)
@@ -163,51 +175,93 @@ class ModuleLoaderService(Thread):
         return {"path": module_path}
 
     def run(self):
-        # Scan the file folder that contains Parsers.  If a Parser is
-        # updated, unload the existing version from memory and reload from
-        # the disk.
-        while not self._stop_event.is_set():
-
-            # Look for recently changed module(s) needing a reload
-            # checking modules dir and getting all modules there
-            module_paths = glob(join(self.modules_dir, '*/'))
-            still_loading = False
-            for module_path in module_paths:
-                still_loading = (
-                        self._load_module(module_path) or
-                        still_loading
-                )
-            if not self.has_loaded and not still_loading and \
-                    len(module_paths) > 0:
-                self.has_loaded = True
-
-            self._unload_removed(module_paths)
-
-            time.sleep(1)  # sleep briefly
+        # Load all Parsers, then watch the folder that contains them.  If a
+        # Parser is updated, unload the existing version from memory and
+        # reload from the disk.
+        self._scan_modules()
+        if not self.hot_reload or self._stop_event.is_set():
+            return
+        self._watcher = InotifyWatcher.create(self.modules_dir)
+        if self._watcher:
+            while not self._stop_event.is_set():
+                changed = self._watcher.wait(self.reload_debounce)
+                if changed is None:
+                    break
+                self._reload_changed(changed)
+        elif self.poll_interval:
+            while not self._stop_event.wait(self.poll_interval):
+                self._scan_modules()
+
+    def _scan_modules(self):
+        # Look for recently changed module(s) needing a reload
+        # checking modules dir and getting all modules there
+        module_paths = glob(join(self.modules_dir, '*/'))
+        still_loading = False
+        for module_path in module_paths:
+            still_loading = (
+                    self._load_module(module_path) or
+                    still_loading
+            )
+        if not self.has_loaded and not still_loading and \
+                len(module_paths) > 0:
+            self.has_loaded = True
+
+        self._unload_removed(module_paths)
+
+    def _reload_changed(self, paths):
+        """ Reload only the modules containing changed paths.
+
+            Arguments:
+                paths: changed files and directories reported by the watcher
+        """
+        module_paths = set()
+        for path in paths:
+            module_name = relpath(path, self.modules_dir).split(os.sep)[0]
+            if module_name in (".", "..") or path == self.modules_dir:
+                # watcher lost track of changes, check everything
+                self._scan_modules()
+                return
+            module_paths.add(join(self.modules_dir, module_name))
+        for module_path in module_paths:
+            if isdir(module_path):
+                self._load_module(module_path, force=True)
+            elif module_path in self.loaded_modules:
+                self._unload_module(module_path)
 
     def stop(self):
         """ Tell the manager to shutdown """
         self._stop_event.set()
+        if self._watcher:
+            self._watcher.close()
 
     @property
     def modules(self):
         # return a list of modules ordered by priority
+        return list(self._modules)
+
+    def _on_modules_changed(self):
+        """ Rebuild state derived from loaded modules, called whenever a
+        module is loaded, reloaded or removed """
         modules = []
         for module in self.loaded_modules:
             instance = self.loaded_modules[module].get("instance")
             if instance:
                 modules.append((module, instance.priority))
         modules = sorted(modules, key=lambda kw: kw[1])
-        return [p[0] for p in modules]
+        self._modules = tuple(p[0] for p in modules)
 
     def get_module(self, module):
         return self.loaded_modules[module].get("instance")
 
-    def _load_module(self, module_path):
+    def _load_module(self, module_path, force=False):
         """
             Check if unloaded module or changed module needs reloading
             and perform loading if necessary.
 
+            Arguments:
+                force: reload the module even if no file is newer, i.e. a
+                       file was deleted
+
             Returns True if the module was loaded/reloaded
         """
         module_path = module_path.rstrip('/')
@@ -226,11 +280,11 @@ class ModuleLoaderService(Thread):
         last_mod = module.get("last_modified", 0)
 
         # checking if module is loaded and hasn't been modified on disk
-        if module.get("loaded") and modified <= last_mod:
+        if module.get("loaded") and modified <= last_mod and not force:
             return False  # Nothing to do!
 
         # check if module was modified
-        elif module.get("instance") and modified > last_mod:
+        elif module.get("instance"):
 
             LOG.debug("Reloading Parser: " + basename(module_path))
             # removing listeners and stopping threads
@@ -253,15 +307,20 @@ class ModuleLoaderService(Thread):
 
         module["loaded"] = True
         desc = self.create_module_descriptor(module_path)
-        module["instance"] = self.load_module(desc, module["id"],
-                                              blacklist=self.blacklist,
-                                              bus=self.bus,
-                                              config=self.config_core)
+        module["instance"] = self._create_module(desc, module["id"])
         module["last_modified"] = modified
+        self._on_modules_changed()
         if module['instance'] is not None:
             return True
         return False
 
+    def _create_module(self, module_descriptor, module_name):
+        """ Load a module instance, see load_module """
+        return self.load_module(module_descriptor, module_name,
+                                blacklist=self.blacklist,
+                                bus=self.bus,
+                                config=self.config_core)
+
     def _unload_removed(self, paths):
         """ Shutdown removed modules.
 
@@ -274,19 +333,29 @@ class ModuleLoaderService(Thread):
         removed_modules = [str(s) for s in modules.keys() if
                            str(s) not in paths]
         for s in removed_modules:
-            LOG.info('removing {}'.format(s))
-            try:
-                LOG.debug('Removing: {}'.format(modules[s]))
-                modules[s]['instance'].default_shutdown()
-            except Exception as e:
-                LOG.exception(e)
-            self.loaded_modules.pop(s)
+            self._unload_module(s)
+
+    def _unload_module(self, path):
+        """ Shutdown a loaded module.
+
+            Arguments:
+                path: directory of the module
+        """
+        LOG.info('removing {}'.format(path))
+        try:
+            LOG.debug('Removing: {}'.format(self.loaded_modules[path]))
+            self.loaded_modules[path]['instance'].default_shutdown()
+        except Exception as e:
+            LOG.exception(e)
+        self.loaded_modules.pop(path)
+        self._on_modules_changed()
 
     def shutdown(self):
         self.stop()
 
 
 class AudioParsersService(ModuleLoaderService):
+    HOOKS = ("on_audio", "on_hotword", "on_speech", "on_speech_end")
 
     def __init__(self, bus, config=None):
         parsers_dir = join(dirname(__file__), "modules").rstrip("/")
@@ -294,35 +363,161 @@ class AudioParsersService(ModuleLoaderService):
                                                   config=config)
         self.config = self.config_core.get("audio_parsers", {})
         self.blacklist = self.config.get("blacklist", [])
+        self.hot_reload = self.config.get("hot_reload", True)
+        self.poll_interval = self.config.get("poll_interval", 1)
+        self.reload_debounce = self.config.get("reload_debounce", 0.5)
+        # run each parser on its own worker thread, fed by a bounded queue
+        self.threaded = self.config.get("threaded", True)
+        self.queue_size = self.config.get("queue_size", 64)
+        self.drop_policy = self.config.get("drop_policy", "drop_oldest")
+        # max seconds get_context waits for parsers to finish
+        self.context_timeout = self.config.get("context_timeout", 1.0)
+        self._workers = {}  # module: ParserWorker
+        # runs read only on_speech_end hooks concurrently when not threaded
+        self._speech_end_executor = ThreadPoolExecutor(
+            thread_name_prefix="parser_speech_end")
+        # ids (directory names) of parsers to run in their own process
+        self.isolated = self.config.get("isolated", [])
+        # bound parser hooks in priority order, replaced (never mutated)
+        # when modules change so the audio threads can read them lock free
+        self._hooks = {hook: () for hook in self.HOOKS}
+
+    def _create_module(self, module_descriptor, module_name):
+        path = module_descriptor["path"]
+        if module_name not in self.isolated or \
+                basename(path) in self.blacklist or path in self.blacklist:
+            return super()._create_module(module_descriptor, module_name)
+        LOG.info(f"Loading isolated parser: {module_name}")
+        return IsolatedParser.create(module_descriptor,
+                                     config=self.config_core)
+
+    @staticmethod
+    def _overrides_hook(instance, hook):
+        """ Check if a parser implements hook, isolated parsers report
+        the hooks their parser process implements """
+        overridden = getattr(instance, "overridden_hooks", None)
+        if overridden is not None:
+            return hook in overridden
+        return getattr(type(instance), hook, None) is not \
+            getattr(AudioParser, hook)
+
+    def _on_modules_changed(self):
+        super()._on_modules_changed()
+        instances = {module: self.get_module(module)
+                     for module in self._modules}
+        workers = {}
+        if self.threaded:
+            for module, instance in instances.items():
+                worker = self._workers.get(module)
+                if worker is None or worker.parser is not instance:
+                    parser_config = getattr(instance, "config", {})
+                    worker = ParserWorker(
+                        instance,
+                        parser_config.get("queue_size", self.queue_size),
+                        parser_config.get("drop_policy", self.drop_policy))
+                    worker.start()
+                workers[module] = worker
+        for module, worker in self._workers.items():
+            if workers.get(module) is not worker:
+                worker.stop()
+        self._workers = workers
+
+        hooks = {}
+        for hook in self.HOOKS:
+            callables = []
+            for module, instance in instances.items():
+                # skip parsers that don't override the (no-op) default hook
+                if not self._overrides_hook(instance, hook):
+                    continue
+                worker = workers.get(module)
+                if hook == "on_speech_end":
+                    # read only parsers may run concurrently with others
+                    modifies_audio = getattr(instance, "modifies_audio", True)
+                    if worker is not None:
+                        func = partial(worker.call, hook)
+                    elif not modifies_audio:
+                        func = partial(self._speech_end_executor.submit,
+                                       instance.on_speech_end)
+                    else:
+                        func = instance.on_speech_end
+                    callables.append((func, modifies_audio))
+                elif worker is None:
+                    callables.append(getattr(instance, hook))
+                else:
+                    callables.append(partial(worker.put, hook))
+            hooks[hook] = tuple(callables)
+        self._hooks = hooks
+
+    @property
+    def parser_stats(self):
+        """ queue and latency stats per threaded parser """
+        return {self.get_module(module).name: worker.stats
+                for module, worker in self._workers.items()}
+
+    def stop(self):
+        super().stop()
+        for worker in self._workers.values():
+            worker.stop()
+        self._speech_end_executor.shutdown(wait=False)
 
     def feed_audio(self, chunk):
-        for module in self.modules:
-            instance = self.get_module(module)
-            instance.on_audio(chunk)
+        for on_audio in self._hooks["on_audio"]:
+            on_audio(chunk)
 
     def feed_hotword(self, chunk):
-        for module in self.modules:
-            instance = self.get_module(module)
-            instance.on_hotword(chunk)
+        for on_hotword in self._hooks["on_hotword"]:
+            on_hotword(chunk)
 
     def feed_speech(self, chunk):
-        for module in self.modules:
-            instance = self.get_module(module)
-            instance.on_speech(chunk)
+        for on_speech in self._hooks["on_speech"]:
+            on_speech(chunk)
 
     def get_context(self, audio_data):
+        # Parsers that modify audio run in priority order, each receiving
+        # the previous one's output. Read only parsers are started as soon
+        # as the audio they should see is ready and run concurrently.
+        # Contexts are merged in priority order.
+        results = []
+        deadline = time.time() + self.context_timeout
+        for on_speech_end, modifies_audio in self._hooks["on_speech_end"]:
+            result = on_speech_end(audio_data)
+            if modifies_audio:
+                result = self._wait_for_result(result, deadline)
+                if result is None:
+                    continue
+                audio_data = result[0]
+            results.append(result)
         context = {}
-        for module in self.modules:
-            instance = self.get_module(module)
-            audio_data, data = instance.on_speech_end(audio_data)
-            context = merge_dict(context, data)
+        for result in results:
+            result = self._wait_for_result(result, deadline)
+            if result is not None:
+                context = merge_dict(context, result[1])
         return audio_data, context
 
+    @staticmethod
+    def _wait_for_result(result, deadline):
+        """ Get the result of an on_speech_end call, waiting until deadline
+        if it is running on another thread. Returns None on failure """
+        if not isinstance(result, Future):
+            return result
+        try:
+            return result.result(max(0.0, deadline - time.time()))
+        except TimeoutError:
+            result.cancel()
+            LOG.warning("Audio parser timed out")
+        except Exception as e:
+            LOG.error(f"Audio parser failed: {e}")
+        return None
+
 
 class AudioParser:
     # audio chunks are AudioData objects,
     # read https://github.com/Uberi/speech_recognition/blob/master/speech_recognition/__init__.py#L325
 
+    # False if on_speech_end only reads audio_data and returns it unchanged,
+    # allowing it to run concurrently with other parsers
+    modifies_audio = True
+
     def __init__(self, name="test_parser", priority=50, config=None):
         self.name = name
         self.bus = None
@@ -19,37 +19,44 @@
 # WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
 # USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+from collections import deque
+from math import log10, sqrt
+
 from neon_speech.plugins import AudioParser
-import audioop
-from math import log10
+from neon_speech.utils import SignalStats
 
 
 class BackgroundNoise(AudioParser):
+    modifies_audio = False
+
     def __init__(self, config=None):
         super().__init__("background_noise", 10, config)
-        self._audio = None
+        self._chunks = deque()  # (rms, seconds) of recent audio chunks
+        self._seconds = 0.0
         self._prediction = None
         self._buffer_size = 5  # seconds
 
-    @staticmethod
-    def seconds_to_size(seconds):
-        # 1 seconds of audio.frame_data = 44032
-        return int(seconds * 44032)
-
     def on_audio(self, audio_data):
-        max_size = self.seconds_to_size(self._buffer_size)
-        if self._audio:
-            self._audio.frame_data += audio_data.frame_data
-        else:
-            self._audio = audio_data
-        if len(self._audio.frame_data) > max_size:
-            self._audio.frame_data = self._audio.frame_data[-max_size:]
+        stats = getattr(audio_data, "stats", None) or \
+            SignalStats.measure(audio_data.frame_data, audio_data.sample_width)
+        seconds = len(audio_data.frame_data) / \
+            (audio_data.sample_rate * audio_data.sample_width)
+        self._chunks.append((stats.rms, seconds))
+        self._seconds += seconds
+        while self._seconds > self._buffer_size:
+            self._seconds -= self._chunks.popleft()[1]
 
     def noise_level(self):
         # NOTE: on_audio will usually include a partial wake word at the end,
         # discard the last ~0.7 seconds of audio
-        audio = self._audio.frame_data[:-self.seconds_to_size(0.7)]
-        rms = audioop.rms(audio, 2)
+        discard = 0.7
+        squares = []
+        for rms, seconds in reversed(self._chunks):
+            if discard > 0:
+                discard -= seconds
+            else:
+                squares.append(rms ** 2)
+        rms = sqrt(sum(squares) / len(squares)) if squares else 0
         try:
             decibel = 20 * log10(rms)
         except: # mic unplugged ?
@@ -62,7 +69,8 @@ class BackgroundNoise(AudioParser):
         # then perform STT to enable things like "tell me a joke, Neon"
         self._prediction = self.noise_level()
 
-        self._audio = None
+        self._chunks.clear()
+        self._seconds = 0.0
 
     def on_speech_end(self, audio_data):
         return audio_data, {"noise_level": self._prediction}
@@ -0,0 +1,160 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2021 Neongecko.com Inc.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+# following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions
+#    and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions
+#    and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote
+#    products derived from this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+# USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import time
+from queue import Queue
+from threading import Thread, Lock
+
+import pyaudio
+from mycroft.util import play_ogg, play_wav, play_mp3, resolve_resource_file
+from mycroft.util.log import LOG
+from pydub import AudioSegment
+
+
+class SoundCue:
+    """
+    A sound file resolved once, and decoded once to get its duration (and
+    for direct playback, if enabled).
+    """
+    def __init__(self, sound):
+        """
+        Args:
+            sound (str): resource name or path of the sound file
+        """
+        self.sound = sound
+        self.path = resolve_resource_file(sound)
+        self.segment = None
+        if not self.path:
+            LOG.error(f"could not find audio file: {sound}")
+            return
+        try:
+            self.segment = AudioSegment.from_file(self.path)
+        except Exception as e:
+            # still playable, but is_muted can't cover its duration
+            LOG.warning(f"Could not decode {self.path}: {e}")
+
+    @property
+    def duration(self):
+        """
+        Length of the cue in seconds, None if it could not be decoded
+        """
+        return self.segment.duration_seconds if self.segment else None
+
+
+class SoundCuePlayer(Thread):
+    """
+    Plays preloaded sound cues from a background thread through the
+    configured play_*_cmdline players, or directly via PyAudio if
+    `direct_playback` is set. While a cue is playing (and for `echo_tail`
+    seconds after) `is_muted` is True so the capture thread can replace
+    microphone input with silence instead of blocking on playback.
+    """
+    def __init__(self, echo_tail=0.25, direct_playback=False):
+        """
+        Args:
+            echo_tail (float): seconds to keep muting after playback ends
+            direct_playback (bool): play decoded cues via PyAudio
+        """
+        super().__init__(daemon=True, name="sound_cues")
+        self.echo_tail = echo_tail
+        self.direct_playback = direct_playback
+        self.cues = {}
+        self._queue = Queue()
+        self._lock = Lock()
+        self._pending = 0
+        self._muted_until = 0.0
+        self._pa = None
+
+    def preload(self, sound):
+        """
+        Resolve and decode a sound cue so later playback is immediate
+        Args:
+            sound (str): resource name or path of the sound file
+        Returns:
+            SoundCue for sound
+        """
+        if sound not in self.cues:
+            self.cues[sound] = SoundCue(sound)
+        return self.cues[sound]
+
+    def play(self, sound):
+        """
+        Queue a sound cue for playback without blocking
+        Args:
+            sound (str): resource name or path of the sound file
+        """
+        cue = self.preload(sound)
+        if not cue.path:
+            return
+        with self._lock:
+            self._pending += 1
+            if cue.duration is not None:
+                self._muted_until = max(self._muted_until, time.time()) + \
+                    cue.duration + self.echo_tail
+        self._queue.put(cue)
+
+    @property
+    def is_muted(self):
+        """
+        True while a cue is queued or playing, or within echo_tail after
+        """
+        with self._lock:
+            return self._pending > 0 or time.time() < self._muted_until
+
+    def run(self):
+        while True:
+            cue = self._queue.get()
+            if cue is None:
+                break
+            try:
+                if self.direct_playback and cue.segment is not None:
+                    self._play_segment(cue.segment)
+                elif cue.path.endswith(".wav"):
+                    play_wav(cue.path).wait()
+                elif cue.path.endswith(".mp3"):
+                    play_mp3(cue.path).wait()
+                elif cue.path.endswith(".ogg"):
+                    play_ogg(cue.path).wait()
+            except Exception as e:
+                LOG.warning(e)
+            finally:
+                with self._lock:
+                    self._pending -= 1
+                    self._muted_until = max(self._muted_until,
+                                            time.time() + self.echo_tail)
+        if self._pa is not None:
+            self._pa.terminate()
+            self._pa = None
+
+    def _play_segment(self, segment):
+        if self._pa is None:
+            self._pa = pyaudio.PyAudio()
+        stream = self._pa.open(
+            format=self._pa.get_format_from_width(segment.sample_width),
+            channels=segment.channels, rate=segment.frame_rate, output=True)
+        try:
+            stream.write(segment.raw_data)
+        finally:
+            stream.stop_stream()
+            stream.close()
+
+    def stop(self):
+        self._queue.put(None)
@@ -19,8 +19,68 @@
 # WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
 # USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import md5
+from threading import BoundedSemaphore, Condition, Thread
+
 from mycroft.stt import STTFactory as MycroftSTTFactory, load_stt_plugin
 from mycroft.util.log import LOG
+from speech_recognition import AudioData
+
+
+# `stt` config keys that do not affect the engine itself
+_SERVICE_KEYS = ("cache", "idle_timeout", "warm_up", "api_workers",
+                 "api_max_pending", "api_max_in_flight", "api_timeout",
+                 "api_stream_timeout", "api_max_streams")
+
+
+def get_stt_config(config: dict = None) -> dict:
+    """
+    Get the STT section of a configuration
+    :param config: full configuration or its `stt` section
+    :return: `stt` configuration
+    """
+    config = config or {}
+    return config.get("stt") or config
+
+
+def stt_config_hash(config: dict = None) -> str:
+    """
+    Get a hash of the STT module and its configuration
+    :param config: full configuration or its `stt` section
+    :return: hex digest of the STT configuration
+    """
+    stt_config = {k: v for k, v in get_stt_config(config).items()
+                  if k not in _SERVICE_KEYS}
+    return md5(json.dumps(stt_config, sort_keys=True,
+                          default=str).encode()).hexdigest()
+
+
+def warm_up_stt(engine, lang: str = None, sample_rate: int = 16000,
+                seconds: float = 1.0) -> float:
+    """
+    Run a silent clip through an STT engine so model loading and any first
+    inference overhead happen before a real request
+    :param engine: STT engine to warm up
+    :param lang: language to request
+    :param sample_rate: sample rate of the silent clip
+    :param seconds: length of the silent clip
+    :return: seconds spent warming up
+    """
+    start = time.time()
+    silence = AudioData(bytes(int(sample_rate * seconds) * 2), sample_rate, 2)
+    try:
+        if engine.can_stream:
+            engine.stream_start(lang)
+            engine.stream_data(silence.frame_data)
+            engine.stream_stop()
+        else:
+            engine.execute(silence, lang)
+    except Exception as e:
+        LOG.warning(f"STT warm up failed: {e}")
+    return time.time() - start
 
 
 class STTFactory(MycroftSTTFactory):
@@ -28,7 +88,7 @@ class STTFactory(MycroftSTTFactory):
     @staticmethod
     def create(config=None):
         try:
-            config = config or {}
+            config = get_stt_config(config)
             module = config.get("module", "chromium_stt_plug")
             if module in STTFactory.CLASSES:
                 clazz = STTFactory.CLASSES[module]
@@ -47,3 +107,236 @@ class STTFactory(MycroftSTTFactory):
                 return clazz()
             else:
                 raise
+
+
+class STTEngineRegistry:
+    """
+    Process-wide registry of STT engines keyed by module and config hash.
+    Engines are leased to one consumer at a time and kept warm after release
+    so later consumers (or a reloaded RecognizerLoop) can reuse them; engines
+    idle for longer than `stt.idle_timeout` seconds are dropped by a single
+    reaper thread.
+    """
+    def __init__(self):
+        self._lock = Condition()
+        self._idle = {}  # key: list of (release time, engine, idle_timeout)
+        self._leased = {}  # id(engine): (key, idle_timeout)
+        self._shared = {}  # key: list of (engine, lock) owned by a consumer
+        self._borrowed = {}  # id(engine): lock of a borrowed shared engine
+        self._reaper = None
+        self._next_reap = None  # time the reaper will next wake up
+        self.init_timing = {}  # key: {"create": seconds, "warm_up": seconds}
+
+    def acquire(self, config=None):
+        """
+        Lease an STT engine for the specified configuration
+        :param config: full configuration or its `stt` section
+        :return: STT engine, created via STTFactory.create if none are idle
+        """
+        key = stt_config_hash(config)
+        idle_timeout = get_stt_config(config).get("idle_timeout", 300)
+        with self._lock:
+            idle = self._idle.get(key)
+            engine = idle.pop()[1] if idle else None
+            if idle == []:
+                self._idle.pop(key)
+            if engine is None:
+                # borrow a shared engine its owner isn't using
+                for shared, lock in self._shared.get(key, []):
+                    if lock.acquire(blocking=False):
+                        self._borrowed[id(shared)] = lock
+                        return shared
+        if engine is None:
+            LOG.info(f"Creating STT engine ({key})")
+            start = time.time()
+            engine = STTFactory.create(config=config)
+            timing = {"create": time.time() - start}
+            if get_stt_config(config).get("warm_up", True):
+                timing["warm_up"] = warm_up_stt(engine)
+            LOG.info(f"STT engine ready ({key}): {timing}")
+            self.init_timing[key] = timing
+        with self._lock:
+            self._leased[id(engine)] = (key, idle_timeout)
+        return engine
+
+    def prewarm(self, config=None) -> dict:
+        """
+        Ensure an initialized engine is idle and ready for the specified
+        configuration
+        :param config: full configuration or its `stt` section
+        :return: dict of seconds spent creating and warming up the engine
+        """
+        self.release(self.acquire(config))
+        return self.init_timing.get(stt_config_hash(config), {})
+
+    def release(self, engine):
+        """
+        Return a leased STT engine to the registry
+        :param engine: engine returned by acquire
+        """
+        with self._lock:
+            lock = self._borrowed.pop(id(engine), None)
+            if lock is not None:
+                lock.release()
+                return
+            key, idle_timeout = self._leased.pop(id(engine), (None, None))
+            if key is None:
+                LOG.warning(f"Released unknown STT engine: {engine}")
+                return
+            self._idle.setdefault(key, []).append((time.time(), engine,
+                                                   idle_timeout))
+            if self._reaper is None:
+                self._reaper = Thread(target=self._reap, daemon=True,
+                                      name="stt_registry_reaper")
+                self._reaper.start()
+            elif self._next_reap is None or \
+                    time.time() + idle_timeout < self._next_reap:
+                # expires before the reaper would wake up
+                self._lock.notify()
+
+    def share(self, engine, lock, config=None):
+        """
+        Let other consumers borrow a leased engine while its owner isn't
+        using it. The owner must hold `lock` while using the engine.
+        :param engine: engine leased by the owner
+        :param lock: Lock guarding use of the engine
+        :param config: configuration the engine was acquired with
+        """
+        with self._lock:
+            self._shared.setdefault(stt_config_hash(config), []).append(
+                (engine, lock))
+
+    def unshare(self, engine):
+        """
+        Stop lending a shared engine. Callers should hold the engine's lock
+        so it isn't borrowed when this returns.
+        :param engine: engine passed to share
+        """
+        with self._lock:
+            for key, shared in list(self._shared.items()):
+                shared = [(e, lock) for e, lock in shared if e is not engine]
+                if shared:
+                    self._shared[key] = shared
+                else:
+                    self._shared.pop(key)
+
+    def evict_idle(self):
+        """
+        Drop engines that have been idle for longer than their idle_timeout.
+        Must be called with the registry lock held.
+        :return: seconds until the next idle engine expires, None if none
+        """
+        now = time.time()
+        next_expiration = None
+        for key in list(self._idle):
+            idle = self._idle[key]
+            keep = [i for i in idle if now - i[0] < i[2]]
+            if len(keep) != len(idle):
+                LOG.info(f"Evicting {len(idle) - len(keep)} idle STT "
+                         f"engine(s) ({key})")
+            if keep:
+                self._idle[key] = keep
+            else:
+                self._idle.pop(key)
+            for released, _, idle_timeout in keep:
+                expires_in = released + idle_timeout - now
+                if next_expiration is None or expires_in < next_expiration:
+                    next_expiration = expires_in
+        return next_expiration
+
+    def _reap(self):
+        with self._lock:
+            while True:
+                # sleep until the next engine expires or one is released
+                # that expires sooner
+                timeout = self.evict_idle()
+                self._next_reap = None if timeout is None else \
+                    time.time() + timeout
+                self._lock.wait(timeout)
+
+
+stt_registry = STTEngineRegistry()
+
+
+class STTPoolFullError(RuntimeError):
+    """Raised when a request is submitted to a saturated STTWorkerPool."""
+
+
+class STTWorkerPool:
+    """
+    Pool of worker threads used to serve concurrent transcription requests.
+    Each request leases an STT engine from the STTEngineRegistry.
+    """
+    def __init__(self, config=None, workers=1, max_pending=16,
+                 registry: STTEngineRegistry = None):
+        """
+        :param config: configuration used to create STT engines
+        :param workers: number of worker threads (and max STT instances)
+        :param max_pending: requests allowed to wait for a free worker
+        :param registry: STTEngineRegistry to lease engines from
+        """
+        self.config = config
+        self.workers = max(1, workers)
+        # running and waiting requests the pool will accept
+        self.capacity = self.workers + max(0, max_pending)
+        self.registry = registry or stt_registry
+        self._supports_batch = None
+        self._can_stream = None
+        self._slots = BoundedSemaphore(self.capacity)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                            thread_name_prefix="stt_worker")
+
+    def _run(self, func, *args, **kwargs):
+        stt = self.registry.acquire(self.config)
+        try:
+            return func(stt, *args, **kwargs)
+        finally:
+            self.registry.release(stt)
+
+    def submit(self, func, *args, block=False, **kwargs):
+        """
+        Queue `func(stt, *args, **kwargs)` to run on a free worker
+        :param func: callable accepting a worker's STT instance first
+        :param block: if True, wait for a free slot instead of raising
+        :return: Future resolving to the result of func
+        :raises STTPoolFullError: if the pool is saturated and not block
+        """
+        if not self._slots.acquire(blocking=block):
+            raise STTPoolFullError("STT request queue is full")
+        try:
+            future = self._executor.submit(self._run, func, *args, **kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, func, *args, **kwargs):
+        """
+        Run `func(stt, *args, **kwargs)` on a free worker and wait for it
+        """
+        return self.submit(func, *args, **kwargs).result()
+
+    @property
+    def supports_batch(self) -> bool:
+        """
+        True if the pool's STT engines implement `execute_batch`
+        """
+        if self._supports_batch is None:
+            self._supports_batch = self.run(
+                lambda stt: callable(getattr(stt, "execute_batch", None)),
+                block=True)
+        return self._supports_batch
+
+    @property
+    def can_stream(self) -> bool:
+        """
+        True if the pool's STT engines support streaming
+        """
+        if self._can_stream is None:
+            self._can_stream = self.run(lambda stt: stt.can_stream,
+                                        block=True)
+        return self._can_stream
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
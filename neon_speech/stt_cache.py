@@ -0,0 +1,177 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2021 Neongecko.com Inc.
+#
+# Redistribution and use in source and binary forms, with or without modification, are permitted provided that the
+# following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice, this list of conditions
+#    and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice, this list of conditions
+#    and the following disclaimer in the documentation and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its contributors may be used to endorse or promote
+#    products derived from this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES,
+# INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+# USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import json
+import os
+import time
+from collections import OrderedDict
+from hashlib import sha256
+from os.path import join, isdir, getmtime, getsize
+from threading import Lock
+from typing import Optional
+
+from mycroft.util import get_temp_path
+from mycroft.util.log import LOG
+from speech_recognition import AudioData
+
+
+class TranscriptionCache:
+    """
+    Two-level (memory and disk) LRU cache of transcriptions keyed by a hash of
+    the decoded PCM, the language and the STT configuration.
+    """
+    def __init__(self, config: dict = None, stt_hash: str = ""):
+        """
+        :param config: `stt.cache` configuration
+        :param stt_hash: hash of the STT module and its configuration
+        """
+        config = config or {}
+        self.stt_hash = stt_hash
+        self.path = config.get("path") or get_temp_path("neon_stt_cache")
+        self.max_entries = config.get("max_entries", 256)
+        self.max_disk_size = config.get("max_disk_mb", 64) * 1024 * 1024
+        self.max_age = config.get("max_age", 24 * 60 * 60)
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+        self._memory = OrderedDict()  # key: (time, transcripts)
+        self._disk = OrderedDict()  # key: (time, size)
+        if not isdir(self.path):
+            os.makedirs(self.path)
+        self._load_disk_index()
+
+    def _load_disk_index(self):
+        entries = []
+        for f in os.listdir(self.path):
+            if f.endswith(".json"):
+                file_path = join(self.path, f)
+                entries.append((getmtime(file_path), f[:-5],
+                                getsize(file_path)))
+        for mtime, key, size in sorted(entries):
+            self._disk[key] = (mtime, size)
+
+    def get_key(self, audio_data: AudioData, lang: str) -> str:
+        """
+        Build a cache key for the specified audio and language
+        :param audio_data: decoded audio
+        :param lang: language of the audio
+        :return: hex digest key
+        """
+        digest = sha256(audio_data.frame_data)
+        digest.update(f"{audio_data.sample_rate}:{audio_data.sample_width}:"
+                      f"{lang}:{self.stt_hash}".encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[list]:
+        """
+        Get cached transcriptions for key
+        :param key: key returned by get_key
+        :return: transcriptions or None if not cached
+        """
+        with self._lock:
+            transcripts = self._get_memory(key)
+            if transcripts is None:
+                transcripts = self._get_disk(key)
+            if transcripts is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return transcripts
+
+    def put(self, key: str, transcripts: list):
+        """
+        Cache transcriptions for key
+        :param key: key returned by get_key
+        :param transcripts: transcriptions to cache
+        """
+        if not transcripts:
+            return
+        now = time.time()
+        with self._lock:
+            self._put_memory(key, now, transcripts)
+            try:
+                file_path = join(self.path, f"{key}.json")
+                with open(file_path, "w") as f:
+                    json.dump(transcripts, f)
+                self._disk[key] = (now, getsize(file_path))
+                self._disk.move_to_end(key)
+                self._evict_disk()
+            except Exception as e:
+                LOG.error(f"Failed to write transcription cache: {e}")
+
+    @property
+    def stats(self) -> dict:
+        return {"hits": self.hits,
+                "misses": self.misses,
+                "memory_entries": len(self._memory),
+                "disk_entries": len(self._disk)}
+
+    def _put_memory(self, key, timestamp, transcripts):
+        self._memory[key] = (timestamp, transcripts)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _get_memory(self, key):
+        if key not in self._memory:
+            return None
+        timestamp, transcripts = self._memory[key]
+        if time.time() - timestamp > self.max_age:
+            self._memory.pop(key)
+            return None
+        self._memory.move_to_end(key)
+        return transcripts
+
+    def _get_disk(self, key):
+        if key not in self._disk:
+            return None
+        timestamp, _ = self._disk[key]
+        if time.time() - timestamp > self.max_age:
+            self._remove_disk(key)
+            return None
+        try:
+            with open(join(self.path, f"{key}.json")) as f:
+                transcripts = json.load(f)
+        except Exception as e:
+            LOG.warning(f"Failed to read transcription cache: {e}")
+            self._remove_disk(key)
+            return None
+        self._disk.move_to_end(key)
+        self._put_memory(key, timestamp, transcripts)
+        return transcripts
+
+    def _evict_disk(self):
+        now = time.time()
+        total_size = sum(size for _, size in self._disk.values())
+        for key in list(self._disk.keys()):
+            timestamp, size = self._disk[key]
+            if total_size <= self.max_disk_size and \
+                    now - timestamp <= self.max_age:
+                break
+            self._remove_disk(key)
+            total_size -= size
+
+    def _remove_disk(self, key):
+        self._disk.pop(key, None)
+        try:
+            os.remove(join(self.path, f"{key}.json"))
+        except FileNotFoundError:
+            pass
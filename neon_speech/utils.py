@@ -18,10 +18,21 @@
 # SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY,
 # WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
 # USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import audioop
+import os
 import re
+import wave
+from array import array
+from base64 import b64decode
+from collections import namedtuple
+from io import BytesIO
+from math import log10
+from typing import Union
 
 import pyaudio
 from mycroft.util.log import LOG
+from pydub import AudioSegment
+from speech_recognition import AudioData
 
 
 def find_input_device(device_name):
@@ -45,55 +56,224 @@ def find_input_device(device_name):
     return None
 
 
-def get_audio_file_stream(wav_file: str, sample_rate: int = 16000):
+def read_audio_file(audio_file: str, sample_rate: int = 16000,
+                    sample_width: int = 2) -> AudioData:
     """
-    Creates a FileStream object for the specified wav_file with the specified output sample_rate.
+    Decodes an audio file once into mono PCM at the requested format.
     Args:
-        wav_file: Path to file to read
-        sample_rate: Desired output sample rate (None for wav_file sample rate)
+        audio_file: Path to file to read
+        sample_rate: Desired output sample rate (None for file sample rate)
+        sample_width: Desired output sample width in bytes
 
     Returns:
-        FileStream object for the passed audio file
+        AudioData object containing the decoded audio
     """
-    class FileStream:
-        MIN_S_TO_DEBUG = 5.0
-
-        # How long between printing debug info to screen
-        UPDATE_INTERVAL_S = 1.0
-
-        def __init__(self, file_name):
-            self.file = get_file_as_wav(file_name, sample_rate)
-            self.sample_rate = self.file.getframerate()
-            # if sample_rate and self.sample_rate != sample_rate:
-            #     sound = AudioSegment.from_file(file_name, format='wav', frame_rate=self.sample_rate)
-            #     sound = sound.set_frame_rate(sample_rate)
-            #     _, tempfile = mkstemp()
-            #     sound.export(tempfile, format='wav')
-            #     self.file = wave.open(tempfile, 'rb')
-            #     self.sample_rate = self.file.getframerate()
-            self.size = self.file.getnframes()
-            self.sample_width = self.file.getsampwidth()
-            self.last_update_time = 0.0
-
-            self.total_s = self.size / self.sample_rate / self.sample_width
-
-        def calc_progress(self):
-            return float(self.file.tell()) / self.size
-
-        def read(self, chunk_size):
-
-            progress = self.calc_progress()
-            if progress == 1.0:
-                raise EOFError
-
-            return self.file.readframes(chunk_size)
-
-        def close(self):
-            self.file.close()
-
-    if not os.path.isfile(wav_file):
-        raise FileNotFoundError
-    try:
-        return FileStream(wav_file)
-    except Exception as e:
-        raise e
+    if not os.path.isfile(audio_file):
+        raise FileNotFoundError(audio_file)
+    return _segment_to_audio_data(AudioSegment.from_file(audio_file),
+                                  sample_rate, sample_width)
+
+
+def decode_audio_data(audio: Union[str, bytes], sample_rate: int = 16000,
+                      sample_width: int = 2, audio_format: str = None,
+                      source_rate: int = None, source_width: int = None,
+                      channels: int = 1) -> AudioData:
+    """
+    Decodes in-memory audio without writing it to the filesystem.
+    Args:
+        audio: base64-encoded string or raw bytes of audio
+        sample_rate: Desired output sample rate (None for input sample rate)
+        sample_width: Desired output sample width in bytes
+        audio_format: Format of `audio` ("pcm", "wav", "flac", etc.);
+            None to detect from the file header
+        source_rate: Sample rate of `audio` (required for "pcm")
+        source_width: Sample width in bytes of `audio` (required for "pcm")
+        channels: Number of channels in `audio` (used for "pcm")
+
+    Returns:
+        AudioData object containing the decoded audio
+    """
+    if isinstance(audio, str):
+        audio = b64decode(audio)
+    audio_format = (audio_format or "").lower()
+    if not audio_format and audio[:4] == b"RIFF":
+        audio_format = "wav"
+    if audio_format in ("pcm", "raw"):
+        if not source_rate or not source_width:
+            raise ValueError("sample_rate and sample_width required for pcm")
+        segment = AudioSegment(data=audio, sample_width=source_width,
+                               frame_rate=source_rate, channels=channels)
+    else:
+        segment = None
+        if audio_format == "wav":
+            try:
+                with wave.open(BytesIO(audio), "rb") as wav:
+                    segment = AudioSegment(
+                        data=wav.readframes(wav.getnframes()),
+                        sample_width=wav.getsampwidth(),
+                        frame_rate=wav.getframerate(),
+                        channels=wav.getnchannels())
+            except wave.Error as e:
+                # i.e. float or WAVE_FORMAT_EXTENSIBLE, decode with ffmpeg
+                LOG.debug(f"Decoding wav with pydub: {e}")
+        if segment is None:
+            segment = AudioSegment.from_file(BytesIO(audio),
+                                             format=audio_format or None)
+    return _segment_to_audio_data(segment, sample_rate, sample_width)
+
+
+def _segment_to_audio_data(segment: AudioSegment, sample_rate: int,
+                           sample_width: int) -> AudioData:
+    segment = segment.set_channels(1).set_sample_width(sample_width)
+    if sample_rate:
+        segment = segment.set_frame_rate(sample_rate)
+    return AudioData(segment.raw_data, segment.frame_rate,
+                     segment.sample_width)
+
+
+def iter_audio_chunks(audio_data: AudioData, chunk_size: int = 1024):
+    """
+    Yields zero-copy chunks of the PCM data in audio_data.
+    Args:
+        audio_data: AudioData object to split
+        chunk_size: Number of frames per chunk
+
+    Returns:
+        Generator of memoryview slices of audio_data.frame_data
+    """
+    buffer = memoryview(audio_data.frame_data)
+    step = chunk_size * audio_data.sample_width
+    for start in range(0, len(buffer), step):
+        yield buffer[start:start + step]
+
+
+class RollingAudioBuffer:
+    """
+    Fixed-capacity byte buffer that keeps the most recently written audio.
+    Data is mirrored into a buffer twice the capacity so the most recent
+    bytes are always contiguous and can be read as a zero-copy memoryview.
+    """
+    def __init__(self, capacity: int, initial: bytes = b""):
+        """
+        Args:
+            capacity: Max number of bytes to keep
+            initial: Optional data to write to the buffer
+        """
+        self.capacity = capacity
+        self._buffer = bytearray(2 * capacity)
+        self._view = memoryview(self._buffer)
+        self._pos = 0
+        self._size = 0
+        if initial:
+            self.write(initial)
+
+    def __len__(self):
+        return self._size
+
+    def clear(self, initial: bytes = b""):
+        """
+        Empty the buffer
+        Args:
+            initial: Optional data to write to the emptied buffer
+        """
+        self._pos = 0
+        self._size = 0
+        if initial:
+            self.write(initial)
+
+    def write(self, data: bytes):
+        """
+        Append data, dropping the oldest bytes once capacity is reached
+        Args:
+            data: bytes-like object to append
+        """
+        data = memoryview(data)
+        if len(data) > self.capacity:
+            data = data[-self.capacity:]
+        length = len(data)
+        first = min(length, self.capacity - self._pos)
+        for start in (self._pos, self._pos + self.capacity):
+            self._view[start:start + first] = data[:first]
+        if first < length:
+            for start in (0, self.capacity):
+                self._view[start:start + length - first] = data[first:]
+        self._pos = (self._pos + length) % self.capacity
+        self._size = min(self.capacity, self._size + length)
+
+    def tail(self, size: int = None) -> memoryview:
+        """
+        Get the most recently written bytes without copying
+        Args:
+            size: Max number of bytes to return (None for all buffered data)
+
+        Returns:
+            memoryview of the newest `size` bytes, valid until the next write
+        """
+        size = self._size if size is None else min(size, self._size)
+        end = self._pos + self.capacity
+        return self._view[end - size:end]
+
+
+ChunkStats = namedtuple("ChunkStats", ["rms", "db", "peak", "zcr"])
+
+
+class SignalStats:
+    """
+    Computes signal statistics once per audio chunk and keeps a rolling
+    window of chunk RMS in a preallocated array. Peak and zero-crossing rate
+    of each chunk are available from `last` and measure.
+    """
+    def __init__(self, window_size: int):
+        """
+        Args:
+            window_size: Number of chunks to keep in the rolling windows
+        """
+        self.window_size = max(1, window_size)
+        self.rms = array('d', bytes(8 * self.window_size))
+        self.count = 0
+        self.last = None
+        self._idx = 0
+        self._rms_sum = 0.0
+
+    @staticmethod
+    def measure(chunk: bytes, sample_width: int = 2) -> ChunkStats:
+        """
+        Compute statistics for a single chunk of PCM audio
+        Args:
+            chunk: PCM audio
+            sample_width: Sample width of chunk in bytes
+
+        Returns:
+            ChunkStats with RMS, RMS in dB, peak amplitude and zero-crossing
+            rate (crossings per sample)
+        """
+        rms = audioop.rms(chunk, sample_width)
+        frames = len(chunk) // sample_width
+        return ChunkStats(rms=rms,
+                          db=20 * log10(rms) if rms > 0 else 0.0,
+                          peak=audioop.max(chunk, sample_width),
+                          zcr=audioop.cross(chunk, sample_width) / frames
+                          if frames else 0.0)
+
+    def add(self, stats: ChunkStats):
+        """
+        Add a chunk's statistics to the rolling window
+        Args:
+            stats: ChunkStats returned by measure
+        """
+        self._rms_sum += stats.rms - self.rms[self._idx]
+        self.rms[self._idx] = stats.rms
+        self._idx = (self._idx + 1) % self.window_size
+        self.count = min(self.count + 1, self.window_size)
+        self.last = stats
+
+    @property
+    def full(self) -> bool:
+        return self.count == self.window_size
+
+    @property
+    def avg_rms(self) -> float:
+        """
+        Mean RMS of the chunks in the rolling window
+        """
+        return self._rms_sum / self.count if self.count else 0.0
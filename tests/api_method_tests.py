@@ -16,13 +16,15 @@
 # Specialized conversational reconveyance options from Conversation Processing Intelligence Corp.
 # US Patents 2008-2021: US7424516, US20140161250, US20140177813, US8638908, US8068604, US8553852, US10530923, US10530924
 # China Patent: CN102017585  -  Europe Patent: EU2156652  -  Patents Pending
-from time import sleep
+from time import sleep, time
 
 import os
 import sys
 import mock
 import unittest
+import wave
 
+from base64 import b64encode
 from multiprocessing import Process
 
 from mycroft_bus_client import MessageBusClient, Message
@@ -52,7 +54,16 @@ class TestAPIMethods(unittest.TestCase):
         cls.bus.run_in_thread()
         while not cls.bus.started_running:
             sleep(1)
-        sleep(15)
+        ready = None
+        timeout = time() + 60
+        while not (ready and ready.data.get("ready")):
+            if time() > timeout:
+                cls.bus_thread.terminate()
+                cls.speech_thread.terminate()
+                raise TimeoutError("Speech service not ready after 60s")
+            ready = cls.bus.wait_for_response(Message("neon.speech.is_ready"))
+            if not (ready and ready.data.get("ready")):
+                sleep(1)
 
     @classmethod
     def tearDownClass(cls) -> None:
@@ -60,6 +71,26 @@ class TestAPIMethods(unittest.TestCase):
         cls.bus_thread.terminate()
         cls.speech_thread.terminate()
 
+    def test_is_ready(self):
+        ready = self.bus.wait_for_response(Message("neon.speech.is_ready"))
+        self.assertTrue(ready.data["ready"])
+        self.assertIsInstance(ready.data["timing"]["stt"], dict)
+        self.assertIsInstance(ready.data["timing"]["hotwords"], dict)
+
+    def test_get_queue_stats(self):
+        stats = self.bus.wait_for_response(
+            Message("neon.speech.get_queue_stats"))
+        self.assertIsInstance(stats.data["depth"], int)
+        self.assertIsInstance(stats.data["dropped"], int)
+        self.assertIsInstance(stats.data["stale"], int)
+
+    def test_get_parser_stats(self):
+        stats = self.bus.wait_for_response(
+            Message("neon.speech.get_parser_stats"))
+        self.assertIn("background_noise", stats.data)
+        self.assertIsInstance(stats.data["background_noise"]["dropped"], int)
+        self.assertIsInstance(stats.data["background_noise"]["latency"], dict)
+
     def test_get_stt_no_file(self):
         context = {"client": "tester",
                    "ident": "123",
@@ -100,6 +131,38 @@ class TestAPIMethods(unittest.TestCase):
         self.assertIsInstance(stt_resp.data.get("transcripts"), list)
         self.assertIn("stop", stt_resp.data.get("transcripts"))
 
+    def test_get_stt_inline_audio(self):
+        context = {"client": "tester",
+                   "ident": "1234567",
+                   "user": "TestRunner"}
+        with open(os.path.join(AUDIO_FILE_PATH, "stop.wav"), "rb") as f:
+            audio_data = b64encode(f.read()).decode("utf-8")
+        stt_resp = self.bus.wait_for_response(Message("neon.get_stt", {"audio_data": audio_data,
+                                                                       "audio_format": "wav"},
+                                                      context), context["ident"])
+        self.assertEqual(stt_resp.context, context)
+        self.assertIsInstance(stt_resp.data.get("parser_data"), dict)
+        self.assertIn("stop", stt_resp.data.get("transcripts"))
+
+    def test_get_stt_batch(self):
+        handle_item = mock.Mock()
+        self.bus.on("neon.get_stt.batch.item", handle_item)
+        context = {"client": "tester",
+                   "ident": "123456789",
+                   "user": "TestRunner"}
+        items = [os.path.join(AUDIO_FILE_PATH, "stop.wav"),
+                 {"audio_file": os.path.join(AUDIO_FILE_PATH, "test.txt")}]
+        stt_resp = self.bus.wait_for_response(Message("neon.get_stt.batch", {"items": items}, context),
+                                              context["ident"], 30.0)
+        self.bus.remove("neon.get_stt.batch.item", handle_item)
+        self.assertEqual(stt_resp.context, context)
+        results = stt_resp.data.get("results")
+        self.assertEqual(len(results), len(items))
+        self.assertIn("stop", results[0].get("transcripts"))
+        self.assertIsInstance(results[0].get("parser_data"), dict)
+        self.assertIsInstance(results[1].get("error"), str)
+        self.assertEqual(handle_item.call_count, len(items))
+
     def test_audio_input_valid(self):
         handle_utterance = mock.Mock()
         self.bus.once("recognizer_loop:utterance", handle_utterance)
@@ -116,6 +179,34 @@ class TestAPIMethods(unittest.TestCase):
         self.assertIsInstance(stt_resp.data.get("skills_recv"), bool)
         handle_utterance.assert_called_once()
 
+    def test_audio_input_stream(self):
+        handle_utterance = mock.Mock()
+        self.bus.once("recognizer_loop:utterance", handle_utterance)
+        context = {"client": "tester",
+                   "ident": "22222",
+                   "user": "TestRunner"}
+        with wave.open(os.path.join(AUDIO_FILE_PATH, "stop.wav"), "rb") as f:
+            stream_data = {"stream_id": "test_stream",
+                           "sample_rate": f.getframerate(),
+                           "sample_width": f.getsampwidth()}
+            self.bus.emit(Message("neon.audio_input.stream.start", stream_data, context))
+            index = 0
+            chunk = f.readframes(1024)
+            while chunk:
+                self.bus.emit(Message("neon.audio_input.stream.data",
+                                      {"stream_id": "test_stream",
+                                       "index": index,
+                                       "audio_data": b64encode(chunk).decode("utf-8")}, context))
+                index += 1
+                chunk = f.readframes(1024)
+        stt_resp = self.bus.wait_for_response(Message("neon.audio_input.stream.stop",
+                                                      {"stream_id": "test_stream",
+                                                       "chunks": index}, context),
+                                              context["ident"], 30.0)
+        self.assertIsInstance(stt_resp, Message)
+        self.assertIn("stop", stt_resp.data.get("transcripts"))
+        handle_utterance.assert_called_once()
+
     # TODO: Test locking DM
 
 
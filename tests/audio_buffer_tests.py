@@ -0,0 +1,69 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+#
+# Copyright 2008-2021 Neongecko.com Inc. | All Rights Reserved
+#
+# Notice of License - Duplicating this Notice of License near the start of any file containing
+# a derivative of this software is a condition of license for this software.
+# Friendly Licensing:
+# No charge, open source royalty free use of the Neon AI software source and object is offered for
+# educational users, noncommercial enthusiasts, Public Benefit Corporations (and LLCs) and
+# Social Purpose Corporations (and LLCs). Developers can contact developers@neon.ai
+# For commercial licensing, distribution of derivative works or redistribution please contact licenses@neon.ai
+# Distributed on an "AS IS” basis without warranties or conditions of any kind, either express or implied.
+# Trademarks of Neongecko: Neon AI(TM), Neon Assist (TM), Neon Communicator(TM), Klat(TM)
+# Authors: Guy Daniels, Daniel McKnight, Regina Bloomstine, Elon Gasper, Richard Leeds
+#
+# Specialized conversational reconveyance options from Conversation Processing Intelligence Corp.
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from neon_speech.utils import RollingAudioBuffer
+
+
+class TestRollingAudioBuffer(unittest.TestCase):
+    def test_write_under_capacity(self):
+        buffer = RollingAudioBuffer(8)
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(bytes(buffer.tail()), b"")
+        buffer.write(b"abc")
+        buffer.write(b"de")
+        self.assertEqual(len(buffer), 5)
+        self.assertEqual(bytes(buffer.tail()), b"abcde")
+
+    def test_wraparound(self):
+        buffer = RollingAudioBuffer(8)
+        buffer.write(b"abcdef")
+        buffer.write(b"ghij")
+        self.assertEqual(len(buffer), 8)
+        self.assertEqual(bytes(buffer.tail()), b"cdefghij")
+        buffer.write(b"klmnopq")
+        self.assertEqual(bytes(buffer.tail()), b"jklmnopq")
+
+    def test_write_over_capacity(self):
+        buffer = RollingAudioBuffer(8, b"xyz")
+        buffer.write(b"0123456789abcdef")
+        self.assertEqual(len(buffer), 8)
+        self.assertEqual(bytes(buffer.tail()), b"89abcdef")
+
+    def test_tail(self):
+        buffer = RollingAudioBuffer(8)
+        buffer.write(b"abcdef")
+        buffer.write(b"ghij")
+        self.assertIsInstance(buffer.tail(), memoryview)
+        self.assertEqual(bytes(buffer.tail(3)), b"hij")
+        self.assertEqual(bytes(buffer.tail(0)), b"")
+        self.assertEqual(bytes(buffer.tail(20)), b"cdefghij")
+
+    def test_clear(self):
+        buffer = RollingAudioBuffer(8, b"abcdef")
+        buffer.clear(b"xy")
+        self.assertEqual(len(buffer), 2)
+        self.assertEqual(bytes(buffer.tail()), b"xy")
+        buffer.clear()
+        self.assertEqual(bytes(buffer.tail()), b"")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,177 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+#
+# Copyright 2008-2021 Neongecko.com Inc. | All Rights Reserved
+#
+# Notice of License - Duplicating this Notice of License near the start of any file containing
+# a derivative of this software is a condition of license for this software.
+# Friendly Licensing:
+# No charge, open source royalty free use of the Neon AI software source and object is offered for
+# educational users, noncommercial enthusiasts, Public Benefit Corporations (and LLCs) and
+# Social Purpose Corporations (and LLCs). Developers can contact developers@neon.ai
+# For commercial licensing, distribution of derivative works or redistribution please contact licenses@neon.ai
+# Distributed on an "AS IS” basis without warranties or conditions of any kind, either express or implied.
+# Trademarks of Neongecko: Neon AI(TM), Neon Assist (TM), Neon Communicator(TM), Klat(TM)
+# Authors: Guy Daniels, Daniel McKnight, Regina Bloomstine, Elon Gasper, Richard Leeds
+#
+# Specialized conversational reconveyance options from Conversation Processing Intelligence Corp.
+import os
+import sys
+import unittest
+
+from time import sleep, time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from neon_speech.plugins import AudioParser, AudioParsersService
+
+CONFIG = {"audio_parsers": {}}
+
+
+class DefaultParser(AudioParser):
+    """Overrides no hooks"""
+
+
+class SpeechParser(AudioParser):
+    def __init__(self, name="speech_parser", priority=50):
+        super().__init__(name, priority, config=CONFIG)
+        self.calls = []
+
+    def on_speech(self, audio_data):
+        self.calls.append(("on_speech", audio_data))
+
+    def on_speech_end(self, audio_data):
+        self.calls.append(("on_speech_end", audio_data))
+        return audio_data, {self.name: True}
+
+
+class AudioSpeechParser(SpeechParser):
+    def on_audio(self, audio_data):
+        self.calls.append(("on_audio", audio_data))
+
+
+class ModifyingParser(AudioParser):
+    def __init__(self, name="modifier", priority=10):
+        super().__init__(name, priority, config=CONFIG)
+
+    def on_speech_end(self, audio_data):
+        return audio_data + "_modified", {self.name: True}
+
+
+class ContextParser(AudioParser):
+    modifies_audio = False
+
+    def __init__(self, name="context", priority=20, delay=0.0):
+        super().__init__(name, priority, config=CONFIG)
+        self.delay = delay
+        self.received = None
+
+    def on_speech_end(self, audio_data):
+        self.received = audio_data
+        sleep(self.delay)
+        return audio_data, {self.name: True}
+
+
+def get_service(parsers, threaded=False, **config):
+    config = dict(config, threaded=threaded)
+    service = AudioParsersService(None, {"audio_parsers": config})
+    for parser in parsers:
+        service.loaded_modules[parser.name] = {"instance": parser}
+    service._on_modules_changed()
+    return service
+
+
+class TestHookDispatch(unittest.TestCase):
+    def test_overrides_hook(self):
+        default = DefaultParser(config=CONFIG)
+        subclass = AudioSpeechParser()
+        for hook in AudioParsersService.HOOKS:
+            self.assertFalse(AudioParsersService._overrides_hook(default,
+                                                                 hook))
+        self.assertTrue(AudioParsersService._overrides_hook(subclass,
+                                                            "on_audio"))
+        # inherited from SpeechParser
+        self.assertTrue(AudioParsersService._overrides_hook(subclass,
+                                                            "on_speech"))
+        self.assertFalse(AudioParsersService._overrides_hook(subclass,
+                                                             "on_hotword"))
+
+    def test_overridden_hooks_attribute(self):
+        class Isolated:
+            overridden_hooks = ("on_hotword",)
+        self.assertTrue(AudioParsersService._overrides_hook(Isolated(),
+                                                            "on_hotword"))
+        self.assertFalse(AudioParsersService._overrides_hook(Isolated(),
+                                                             "on_audio"))
+
+    def test_dispatch_table(self):
+        default = DefaultParser(name="default", config=CONFIG)
+        speech = SpeechParser()
+        audio = AudioSpeechParser("audio_parser", priority=10)
+        service = get_service([default, speech, audio])
+        try:
+            self.assertEqual(len(service._hooks["on_audio"]), 1)
+            self.assertEqual(len(service._hooks["on_hotword"]), 0)
+            self.assertEqual(len(service._hooks["on_speech"]), 2)
+            # the default parser's hooks assert AudioData, so a call with
+            # anything else would raise if it wasn't skipped
+            service.feed_audio("chunk")
+            service.feed_hotword("chunk")
+            service.feed_speech("chunk")
+            self.assertEqual(audio.calls, [("on_audio", "chunk"),
+                                           ("on_speech", "chunk")])
+            self.assertEqual(speech.calls, [("on_speech", "chunk")])
+            _, context = service.get_context("audio")
+            self.assertEqual(context, {"audio_parser": True,
+                                       "speech_parser": True})
+        finally:
+            service.stop()
+
+
+class TestConcurrentParsers(unittest.TestCase):
+    def test_context_parser_sees_modified_audio(self):
+        for threaded in (True, False):
+            modifier = ModifyingParser()
+            reader = ContextParser()
+            service = get_service([reader, modifier], threaded=threaded)
+            try:
+                audio, context = service.get_context("audio")
+            finally:
+                service.stop()
+            self.assertEqual(audio, "audio_modified")
+            self.assertEqual(reader.received, "audio_modified")
+            self.assertEqual(context, {"modifier": True, "context": True})
+
+    def test_slow_parser_timeout(self):
+        for threaded in (True, False):
+            modifier = ModifyingParser()
+            slow = ContextParser("slow", delay=1.0)
+            fast = ContextParser("fast", priority=30)
+            service = get_service([modifier, slow, fast], threaded=threaded,
+                                  context_timeout=0.2)
+            try:
+                start = time()
+                audio, context = service.get_context("audio")
+                elapsed = time() - start
+            finally:
+                service.stop()
+            self.assertLess(elapsed, 0.5)
+            self.assertEqual(audio, "audio_modified")
+            # the slow parser's context is dropped, the others are kept
+            self.assertEqual(context, {"modifier": True, "fast": True})
+
+    def test_context_parsers_run_concurrently(self):
+        for threaded in (True, False):
+            parsers = [ContextParser(f"context_{i}", delay=0.2)
+                       for i in range(3)]
+            service = get_service(parsers, threaded=threaded)
+            try:
+                start = time()
+                _, context = service.get_context("audio")
+                elapsed = time() - start
+            finally:
+                service.stop()
+            self.assertLess(elapsed, 0.4)
+            self.assertEqual(len(context), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
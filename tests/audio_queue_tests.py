@@ -0,0 +1,108 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+#
+# Copyright 2008-2021 Neongecko.com Inc. | All Rights Reserved
+#
+# Notice of License - Duplicating this Notice of License near the start of any file containing
+# a derivative of this software is a condition of license for this software.
+# Friendly Licensing:
+# No charge, open source royalty free use of the Neon AI software source and object is offered for
+# educational users, noncommercial enthusiasts, Public Benefit Corporations (and LLCs) and
+# Social Purpose Corporations (and LLCs). Developers can contact developers@neon.ai
+# For commercial licensing, distribution of derivative works or redistribution please contact licenses@neon.ai
+# Distributed on an "AS IS” basis without warranties or conditions of any kind, either express or implied.
+# Trademarks of Neongecko: Neon AI(TM), Neon Assist (TM), Neon Communicator(TM), Klat(TM)
+# Authors: Guy Daniels, Daniel McKnight, Regina Bloomstine, Elon Gasper, Richard Leeds
+#
+# Specialized conversational reconveyance options from Conversation Processing Intelligence Corp.
+import os
+import sys
+import mock
+import unittest
+
+from queue import Empty
+from mycroft.client.speech.listener import AUDIO_DATA, STREAM_START, \
+    STREAM_DATA, STREAM_STOP
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from neon_speech.audio_queue import AudioQueue, DROP_NEWEST, DROP_OLDEST
+
+
+def get_all(queue):
+    items = []
+    try:
+        while True:
+            items.append(queue.get(block=False))
+    except Empty:
+        return items
+
+
+class TestAudioQueue(unittest.TestCase):
+    def test_drop_oldest(self):
+        queue = AudioQueue({"max_size": 2, "policy": DROP_OLDEST})
+        for audio in ("one", "two", "three"):
+            queue.put((AUDIO_DATA, audio, {}))
+        self.assertEqual([i[1] for i in get_all(queue)], ["two", "three"])
+        self.assertEqual(queue.stats["dropped"], 1)
+
+    def test_drop_newest(self):
+        queue = AudioQueue({"max_size": 2, "policy": DROP_NEWEST})
+        for audio in ("one", "two", "three"):
+            queue.put((AUDIO_DATA, audio, {}))
+        self.assertEqual([i[1] for i in get_all(queue)], ["one", "two"])
+        self.assertEqual(queue.stats["dropped"], 1)
+        self.assertEqual(queue.stats["max_depth"], 2)
+
+    def test_stream_control_admitted_when_full(self):
+        queue = AudioQueue({"max_size": 1})
+        queue.put((AUDIO_DATA, "one", {}))
+        queue.put((STREAM_START, None, {}))
+        queue.put((STREAM_STOP, None, {}))
+        queue.put(None)
+        self.assertEqual([i and i[0] for i in get_all(queue)],
+                         [AUDIO_DATA, STREAM_START, STREAM_STOP, None])
+        self.assertEqual(queue.stats["dropped"], 0)
+
+    def test_coalesce_when_full(self):
+        queue = AudioQueue({"max_size": 2})
+        queue.put((STREAM_START, None, {}))
+        for chunk in (b"a", b"b", b"c"):
+            queue.put((STREAM_DATA, chunk, {}))
+        self.assertEqual(get_all(queue), [(STREAM_START, None, {}),
+                                          (STREAM_DATA, b"abc", {})])
+        self.assertEqual(queue.stats["coalesced"], 2)
+
+    def test_coalesce_stream_data(self):
+        queue = AudioQueue({"coalesce_stream_data": True})
+        for chunk in (b"a", b"b"):
+            queue.put((STREAM_DATA, chunk, {}))
+        queue.put((STREAM_STOP, None, {}))
+        queue.put((STREAM_DATA, b"c", {}))
+        self.assertEqual([i[1] for i in get_all(queue)],
+                         [b"ab", None, b"c"])
+        self.assertEqual(queue.stats["coalesced"], 1)
+
+    def test_stale_utterances_discarded(self):
+        queue = AudioQueue({"max_age": 10})
+        context = {"lang": "en-us"}
+        with mock.patch("time.time", return_value=1000.0):
+            queue.put((AUDIO_DATA, "old", context))
+        with mock.patch("time.time", return_value=1008.0):
+            queue.put((AUDIO_DATA, "new", {}))
+            queue.put((STREAM_START, None, {}))
+        with mock.patch("time.time", return_value=1011.0):
+            self.assertEqual([i[1] for i in get_all(queue)], ["new", None])
+        self.assertEqual(queue.stats["stale"], 1)
+        # deadlines are not added to the utterance context
+        self.assertEqual(context, {"lang": "en-us"})
+
+    def test_max_age_disabled(self):
+        queue = AudioQueue({"max_age": 0})
+        with mock.patch("time.time", return_value=1000.0):
+            queue.put((AUDIO_DATA, "one", {}))
+        with mock.patch("time.time", return_value=2000.0):
+            self.assertEqual(queue.get(block=False)[1], "one")
+        self.assertEqual(queue.stats["stale"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
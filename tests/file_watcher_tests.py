@@ -0,0 +1,83 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+#
+# Copyright 2008-2021 Neongecko.com Inc. | All Rights Reserved
+#
+# Notice of License - Duplicating this Notice of License near the start of any file containing
+# a derivative of this software is a condition of license for this software.
+# Friendly Licensing:
+# No charge, open source royalty free use of the Neon AI software source and object is offered for
+# educational users, noncommercial enthusiasts, Public Benefit Corporations (and LLCs) and
+# Social Purpose Corporations (and LLCs). Developers can contact developers@neon.ai
+# For commercial licensing, distribution of derivative works or redistribution please contact licenses@neon.ai
+# Distributed on an "AS IS” basis without warranties or conditions of any kind, either express or implied.
+# Trademarks of Neongecko: Neon AI(TM), Neon Assist (TM), Neon Communicator(TM), Klat(TM)
+# Authors: Guy Daniels, Daniel McKnight, Regina Bloomstine, Elon Gasper, Richard Leeds
+#
+# Specialized conversational reconveyance options from Conversation Processing Intelligence Corp.
+import os
+import sys
+import shutil
+import unittest
+
+from tempfile import mkdtemp
+from threading import Thread
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from neon_speech.file_watcher import InotifyWatcher
+
+
+def write_file(path, content="test"):
+    with open(path, "w") as f:
+        f.write(content)
+
+
+@unittest.skipIf(sys.platform != "linux", "inotify requires Linux")
+class TestInotifyWatcher(unittest.TestCase):
+    def setUp(self) -> None:
+        self.root = mkdtemp()
+        write_file(os.path.join(self.root, "module.py"))
+        self.watcher = InotifyWatcher(self.root)
+
+    def tearDown(self) -> None:
+        self.watcher.close()
+        shutil.rmtree(self.root)
+
+    def test_modify(self):
+        path = os.path.join(self.root, "module.py")
+        write_file(path, "changed")
+        write_file(os.path.join(self.root, "module.pyc"))
+        self.assertEqual(self.watcher.wait(0.1), {path})
+
+    def test_new_directory_watched(self):
+        sub_dir = os.path.join(self.root, "new_module")
+        os.mkdir(sub_dir)
+        self.assertIn(sub_dir, self.watcher.wait(0.1))
+        path = os.path.join(sub_dir, "__init__.py")
+        write_file(path)
+        self.assertEqual(self.watcher.wait(0.1), {path})
+
+    def test_close_releases_waiting_thread(self):
+        fd = self.watcher._fd
+        results = []
+        thread = Thread(target=lambda: results.append(self.watcher.wait()),
+                        daemon=True)
+        thread.start()
+        thread.join(0.2)
+        self.assertTrue(thread.is_alive())
+        self.watcher.close()
+        thread.join(2)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(results, [None])
+        with self.assertRaises(OSError):
+            os.fstat(fd)
+
+    def test_close_without_waiting_thread(self):
+        fd = self.watcher._fd
+        self.watcher.close()
+        with self.assertRaises(OSError):
+            os.fstat(fd)
+        self.assertIsNone(self.watcher.wait())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+#
+# Copyright 2008-2021 Neongecko.com Inc. | All Rights Reserved
+#
+# Notice of License - Duplicating this Notice of License near the start of any file containing
+# a derivative of this software is a condition of license for this software.
+# Friendly Licensing:
+# No charge, open source royalty free use of the Neon AI software source and object is offered for
+# educational users, noncommercial enthusiasts, Public Benefit Corporations (and LLCs) and
+# Social Purpose Corporations (and LLCs). Developers can contact developers@neon.ai
+# For commercial licensing, distribution of derivative works or redistribution please contact licenses@neon.ai
+# Distributed on an "AS IS” basis without warranties or conditions of any kind, either express or implied.
+# Trademarks of Neongecko: Neon AI(TM), Neon Assist (TM), Neon Communicator(TM), Klat(TM)
+# Authors: Guy Daniels, Daniel McKnight, Regina Bloomstine, Elon Gasper, Richard Leeds
+#
+# Specialized conversational reconveyance options from Conversation Processing Intelligence Corp.
+import os
+import sys
+import unittest
+
+from threading import Event
+from time import sleep, time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from neon_speech.hotword_detector import HotwordDetector, HYBRID
+
+
+class MockEngine:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.updates = []
+        self.checks = []
+        self.busy = Event()
+
+    def update(self, chunk):
+        self.busy.set()
+        sleep(self.delay)
+        self.updates.append(chunk)
+        self.busy.clear()
+
+    def found_wake_word(self, audio):
+        self.busy.set()
+        sleep(self.delay)
+        self.checks.append(bytes(audio))
+        self.busy.clear()
+        return False
+
+
+def get_window(seconds, window):
+    window[:] = b"window"
+
+
+class TestHotwordDetector(unittest.TestCase):
+    def get_detector(self, engine, max_queue=4):
+        return HotwordDetector({"hey": {"engine": engine, "mode": HYBRID}},
+                               max_queue=max_queue, check_interval=0.01)
+
+    def test_checks_coalesced(self):
+        engine = MockEngine()
+        detector = self.get_detector(engine)
+        worker = detector.workers[0]
+        for _ in range(3):
+            detector.schedule_checks(get_window, 0.1)
+        self.assertEqual(worker.queue.qsize(), 1)
+        self.assertEqual(worker.coalesced, 2)
+        self.assertEqual(detector.dropped["hey"], 0)
+
+    def test_updates_dropped_before_checks(self):
+        engine = MockEngine()
+        detector = self.get_detector(engine)
+        for i in range(10):
+            detector.feed(bytes([i]))
+            detector.schedule_checks(get_window, 0.1)
+        detector.start()
+        sleep(0.2)
+        detector.stop()
+        # one pending check survived the overload
+        self.assertEqual(engine.checks, [b"window"])
+        self.assertEqual(engine.updates, [bytes([i]) for i in range(7, 10)])
+        self.assertEqual(detector.dropped["hey"], 7)
+
+    def test_windows_reused(self):
+        engine = MockEngine()
+        detector = self.get_detector(engine)
+        detector.start()
+        for _ in range(5):
+            detector.schedule_checks(get_window, 0.1)
+            sleep(0.05)
+        detector.stop()
+        self.assertEqual(len(engine.checks), 5)
+        self.assertEqual(len(detector.windows._free), 1)
+
+    def test_stop_waits_for_engines(self):
+        engine = MockEngine(delay=0.2)
+        detector = self.get_detector(engine)
+        detector.start()
+        detector.feed(b"chunk")
+        self.assertTrue(engine.busy.wait(1))
+        start = time()
+        detector.stop()
+        self.assertGreater(time() - start, 0.1)
+        self.assertFalse(engine.busy.is_set())
+        self.assertFalse(detector.workers[0].is_alive())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+#
+# Copyright 2008-2021 Neongecko.com Inc. | All Rights Reserved
+#
+# Notice of License - Duplicating this Notice of License near the start of any file containing
+# a derivative of this software is a condition of license for this software.
+# Friendly Licensing:
+# No charge, open source royalty free use of the Neon AI software source and object is offered for
+# educational users, noncommercial enthusiasts, Public Benefit Corporations (and LLCs) and
+# Social Purpose Corporations (and LLCs). Developers can contact developers@neon.ai
+# For commercial licensing, distribution of derivative works or redistribution please contact licenses@neon.ai
+# Distributed on an "AS IS” basis without warranties or conditions of any kind, either express or implied.
+# Trademarks of Neongecko: Neon AI(TM), Neon Assist (TM), Neon Communicator(TM), Klat(TM)
+# Authors: Guy Daniels, Daniel McKnight, Regina Bloomstine, Elon Gasper, Richard Leeds
+#
+# Specialized conversational reconveyance options from Conversation Processing Intelligence Corp.
+import os
+import sys
+import unittest
+
+from tempfile import mkdtemp
+from shutil import rmtree
+from speech_recognition import AudioData
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from neon_speech.isolated_parser import IsolatedParser
+
+CONFIG = {"audio_parsers": {}}
+
+# parser modules are loaded from disk in a spawned process
+PARSER_MODULE = """
+from speech_recognition import AudioData
+from neon_speech.plugins import AudioParser
+
+
+class EchoParser(AudioParser):
+    def __init__(self, config=None):
+        super().__init__("echo", 20, config)
+        self.chunks = 0
+
+    def on_audio(self, audio_data):
+        self.chunks += 1
+
+    def on_speech_end(self, audio_data):
+        data = audio_data.frame_data
+        context = {"chunks": self.chunks, "length": len(data),
+                   "nested": {"rate": audio_data.sample_rate}}
+        if data.startswith(b"\\x00"):
+            return audio_data, context
+        return AudioData(data + data, audio_data.sample_rate,
+                         audio_data.sample_width), context
+
+
+def create_module(config=None):
+    return EchoParser(config=config)
+"""
+
+
+class TestIsolatedParser(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.modules_dir = mkdtemp()
+        path = os.path.join(cls.modules_dir, "echo")
+        os.makedirs(path)
+        with open(os.path.join(path, "__init__.py"), "w") as f:
+            f.write(PARSER_MODULE)
+        cls.descriptor = {"path": path}
+
+    @classmethod
+    def tearDownClass(cls):
+        rmtree(cls.modules_dir)
+
+    def setUp(self):
+        self.parser = IsolatedParser(self.descriptor, CONFIG, shm_size=1024)
+
+    def tearDown(self):
+        self.parser.default_shutdown()
+
+    def test_parser_info(self):
+        self.assertEqual(self.parser.name, "echo")
+        self.assertEqual(self.parser.priority, 20)
+        self.assertEqual(set(self.parser.overridden_hooks),
+                         {"on_audio", "on_speech_end"})
+
+    def test_context_round_trip(self):
+        audio = AudioData(b"\x00\x01" * 100, 16000, 2)
+        for _ in range(3):
+            self.parser.on_audio(audio)
+        new_audio, context = self.parser.on_speech_end(audio)
+        self.assertIs(new_audio, audio)
+        self.assertEqual(context, {"chunks": 3, "length": 200,
+                                   "nested": {"rate": 16000}})
+
+    def test_modified_audio(self):
+        audio = AudioData(b"\x01\x02" * 100, 8000, 2)
+        new_audio, context = self.parser.on_speech_end(audio)
+        self.assertEqual(new_audio.frame_data, audio.frame_data * 2)
+        self.assertEqual(new_audio.sample_rate, 8000)
+        self.assertEqual(new_audio.sample_width, 2)
+        self.assertEqual(context["length"], 200)
+
+    def test_buffer_growth(self):
+        audio = AudioData(b"\x00\x01" * 2048, 16000, 2)
+        _, context = self.parser.on_speech_end(audio)
+        self.assertGreaterEqual(self.parser._shm.size, 4096)
+        self.assertEqual(context["length"], 4096)
+
+        # modified audio larger than the buffer is returned through the pipe
+        size = self.parser._shm.size
+        audio = AudioData(b"\x01\x02" * (size // 2), 16000, 2)
+        new_audio, context = self.parser.on_speech_end(audio)
+        self.assertEqual(self.parser._shm.size, size)
+        self.assertEqual(new_audio.frame_data, audio.frame_data * 2)
+
+        # smaller audio keeps using the grown buffer
+        audio = AudioData(b"\x00\x02" * 10, 16000, 2)
+        _, context = self.parser.on_speech_end(audio)
+        self.assertEqual(self.parser._shm.size, size)
+        self.assertEqual(context["length"], 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
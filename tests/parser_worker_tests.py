@@ -0,0 +1,113 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+#
+# Copyright 2008-2021 Neongecko.com Inc. | All Rights Reserved
+#
+# Notice of License - Duplicating this Notice of License near the start of any file containing
+# a derivative of this software is a condition of license for this software.
+# Friendly Licensing:
+# No charge, open source royalty free use of the Neon AI software source and object is offered for
+# educational users, noncommercial enthusiasts, Public Benefit Corporations (and LLCs) and
+# Social Purpose Corporations (and LLCs). Developers can contact developers@neon.ai
+# For commercial licensing, distribution of derivative works or redistribution please contact licenses@neon.ai
+# Distributed on an "AS IS” basis without warranties or conditions of any kind, either express or implied.
+# Trademarks of Neongecko: Neon AI(TM), Neon Assist (TM), Neon Communicator(TM), Klat(TM)
+# Authors: Guy Daniels, Daniel McKnight, Regina Bloomstine, Elon Gasper, Richard Leeds
+#
+# Specialized conversational reconveyance options from Conversation Processing Intelligence Corp.
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from neon_speech.parser_worker import ParserWorker, DROP_NEWEST, DROP_OLDEST
+
+
+class MockParser:
+    name = "mock_parser"
+
+    def __init__(self):
+        self.calls = []
+
+    def on_audio(self, audio_data):
+        self.calls.append(("on_audio", audio_data))
+
+    def on_hotword(self, audio_data):
+        self.calls.append(("on_hotword", audio_data))
+
+    def on_speech_end(self, audio_data):
+        self.calls.append(("on_speech_end", audio_data))
+        return audio_data, {"parsed": True}
+
+
+class TestParserWorker(unittest.TestCase):
+    def setUp(self) -> None:
+        self.parser = MockParser()
+
+    def run_worker(self, worker):
+        # requests are queued before the worker starts, so none are handled
+        # until a drop policy has been applied
+        worker.start()
+        worker.call("on_audio", "done").result(timeout=5)
+        worker.stop()
+        worker.join(5)
+        self.parser.calls.remove(("on_audio", "done"))
+        return self.parser.calls
+
+    def test_drop_oldest(self):
+        worker = ParserWorker(self.parser, max_queue=2, policy=DROP_OLDEST)
+        for chunk in (1, 2, 3):
+            worker.put("on_audio", chunk)
+        self.assertEqual(worker.stats["dropped"], 1)
+        self.assertEqual(self.run_worker(worker),
+                         [("on_audio", 2), ("on_audio", 3)])
+
+    def test_drop_newest(self):
+        worker = ParserWorker(self.parser, max_queue=2, policy=DROP_NEWEST)
+        for chunk in (1, 2, 3):
+            worker.put("on_audio", chunk)
+        self.assertEqual(worker.stats["dropped"], 1)
+        self.assertEqual(self.run_worker(worker),
+                         [("on_audio", 1), ("on_audio", 2)])
+
+    def test_hotwords_never_dropped(self):
+        worker = ParserWorker(self.parser, max_queue=1)
+        worker.put("on_hotword", "hey")
+        for chunk in (1, 2, 3):
+            worker.put("on_audio", chunk)
+        self.assertEqual(self.run_worker(worker),
+                         [("on_hotword", "hey"), ("on_audio", 3)])
+
+    def test_futures_never_dropped(self):
+        worker = ParserWorker(self.parser, max_queue=1)
+        future = worker.call("on_speech_end", "utterance")
+        for chunk in (1, 2, 3):
+            worker.put("on_audio", chunk)
+        self.assertEqual(worker.stats["dropped"], 2)
+        self.assertEqual(self.run_worker(worker),
+                         [("on_speech_end", "utterance"), ("on_audio", 3)])
+        self.assertEqual(future.result(timeout=5),
+                         ("utterance", {"parsed": True}))
+
+    def test_call_exception(self):
+        worker = ParserWorker(self.parser)
+        future = worker.call("missing_hook", None)
+        self.run_worker(worker)
+        self.assertIsInstance(future.exception(timeout=5), AttributeError)
+
+    def test_stop_cancels_pending_calls(self):
+        worker = ParserWorker(self.parser)
+        future = worker.call("on_speech_end", "utterance")
+        worker.stop()
+        self.assertTrue(future.cancelled())
+
+    def test_latency_stats(self):
+        worker = ParserWorker(self.parser)
+        worker.put("on_audio", 1)
+        self.run_worker(worker)
+        latency = worker.stats["latency"]["on_audio"]
+        self.assertEqual(latency["count"], 2)
+        self.assertGreaterEqual(latency["max"], latency["avg"])
+
+
+if __name__ == '__main__':
+    unittest.main()
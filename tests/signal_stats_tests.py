@@ -0,0 +1,72 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+#
+# Copyright 2008-2021 Neongecko.com Inc. | All Rights Reserved
+#
+# Notice of License - Duplicating this Notice of License near the start of any file containing
+# a derivative of this software is a condition of license for this software.
+# Friendly Licensing:
+# No charge, open source royalty free use of the Neon AI software source and object is offered for
+# educational users, noncommercial enthusiasts, Public Benefit Corporations (and LLCs) and
+# Social Purpose Corporations (and LLCs). Developers can contact developers@neon.ai
+# For commercial licensing, distribution of derivative works or redistribution please contact licenses@neon.ai
+# Distributed on an "AS IS” basis without warranties or conditions of any kind, either express or implied.
+# Trademarks of Neongecko: Neon AI(TM), Neon Assist (TM), Neon Communicator(TM), Klat(TM)
+# Authors: Guy Daniels, Daniel McKnight, Regina Bloomstine, Elon Gasper, Richard Leeds
+#
+# Specialized conversational reconveyance options from Conversation Processing Intelligence Corp.
+import os
+import sys
+import unittest
+
+from array import array
+from math import log10, pi, sin, sqrt
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from neon_speech.utils import SignalStats
+
+
+def get_pcm(samples) -> bytes:
+    return array('h', [int(s) for s in samples]).tobytes()
+
+
+class TestSignalStats(unittest.TestCase):
+    def test_measure_constant(self):
+        stats = SignalStats.measure(get_pcm([1000] * 1600))
+        self.assertEqual(stats.rms, 1000)
+        self.assertAlmostEqual(stats.db, 60.0)
+        self.assertEqual(stats.peak, 1000)
+        self.assertEqual(stats.zcr, 0.0)
+
+    def test_measure_sine(self):
+        # 100 Hz at 16 kHz, 10 full periods, phase shifted off zero samples
+        rate, freq, amplitude = 16000, 100, 10000
+        chunk = get_pcm(amplitude * sin(2 * pi * freq * i / rate + pi / 4)
+                        for i in range(1600))
+        stats = SignalStats.measure(chunk)
+        self.assertAlmostEqual(stats.rms, amplitude / sqrt(2), delta=2)
+        self.assertAlmostEqual(stats.db, 20 * log10(amplitude / sqrt(2)),
+                               places=2)
+        self.assertAlmostEqual(stats.peak, amplitude, delta=1)
+        self.assertAlmostEqual(stats.zcr, 2 * freq / rate, delta=1 / 1600)
+
+    def test_measure_silence(self):
+        stats = SignalStats.measure(bytes(3200))
+        self.assertEqual(stats.rms, 0)
+        self.assertEqual(stats.db, 0.0)
+        self.assertEqual(SignalStats.measure(b"").zcr, 0.0)
+
+    def test_rolling_average(self):
+        signal_stats = SignalStats(3)
+        self.assertEqual(signal_stats.avg_rms, 0.0)
+        for level in (100, 200, 300):
+            self.assertFalse(signal_stats.full)
+            signal_stats.add(SignalStats.measure(get_pcm([level] * 160)))
+        self.assertTrue(signal_stats.full)
+        self.assertAlmostEqual(signal_stats.avg_rms, 200)
+        signal_stats.add(SignalStats.measure(get_pcm([600] * 160)))
+        self.assertAlmostEqual(signal_stats.avg_rms, (200 + 300 + 600) / 3)
+        self.assertEqual(signal_stats.last.rms, 600)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+#
+# Copyright 2008-2021 Neongecko.com Inc. | All Rights Reserved
+#
+# Notice of License - Duplicating this Notice of License near the start of any file containing
+# a derivative of this software is a condition of license for this software.
+# Friendly Licensing:
+# No charge, open source royalty free use of the Neon AI software source and object is offered for
+# educational users, noncommercial enthusiasts, Public Benefit Corporations (and LLCs) and
+# Social Purpose Corporations (and LLCs). Developers can contact developers@neon.ai
+# For commercial licensing, distribution of derivative works or redistribution please contact licenses@neon.ai
+# Distributed on an "AS IS” basis without warranties or conditions of any kind, either express or implied.
+# Trademarks of Neongecko: Neon AI(TM), Neon Assist (TM), Neon Communicator(TM), Klat(TM)
+# Authors: Guy Daniels, Daniel McKnight, Regina Bloomstine, Elon Gasper, Richard Leeds
+#
+# Specialized conversational reconveyance options from Conversation Processing Intelligence Corp.
+import os
+import sys
+import mock
+import shutil
+import unittest
+
+from tempfile import mkdtemp
+from speech_recognition import AudioData
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from neon_speech.stt_cache import TranscriptionCache
+
+
+class TestTranscriptionCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.path = mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.path)
+
+    def get_cache(self, **config):
+        return TranscriptionCache(dict(config, path=self.path), "stt_hash")
+
+    def test_get_key(self):
+        cache = self.get_cache()
+        audio = AudioData(b"\x01\x02" * 100, 16000, 2)
+        key = cache.get_key(audio, "en-us")
+        self.assertEqual(key, cache.get_key(AudioData(b"\x01\x02" * 100,
+                                                      16000, 2), "en-us"))
+        self.assertNotEqual(key, cache.get_key(audio, "uk-ua"))
+        self.assertNotEqual(key, TranscriptionCache(
+            {"path": self.path}, "other_hash").get_key(audio, "en-us"))
+
+    def test_hit_miss_counters(self):
+        cache = self.get_cache()
+        self.assertIsNone(cache.get("key"))
+        cache.put("key", ["hello"])
+        self.assertEqual(cache.get("key"), ["hello"])
+        self.assertEqual(cache.get("key"), ["hello"])
+        self.assertEqual(cache.stats["hits"], 2)
+        self.assertEqual(cache.stats["misses"], 1)
+
+    def test_empty_transcripts_not_cached(self):
+        cache = self.get_cache()
+        cache.put("key", [])
+        self.assertIsNone(cache.get("key"))
+        self.assertEqual(cache.stats["disk_entries"], 0)
+
+    def test_memory_size_eviction(self):
+        cache = self.get_cache(max_entries=2)
+        for key in ("one", "two", "three"):
+            cache.put(key, [key])
+        self.assertEqual(cache.stats["memory_entries"], 2)
+        self.assertEqual(cache.stats["disk_entries"], 3)
+        # evicted from memory, reloaded from disk
+        self.assertEqual(cache.get("one"), ["one"])
+        self.assertEqual(cache.stats["hits"], 1)
+        self.assertEqual(cache.stats["memory_entries"], 2)
+
+    def test_disk_size_eviction(self):
+        # room for two ~46 byte entries
+        cache = self.get_cache(max_disk_mb=100 / (1024 * 1024))
+        for key in ("one", "two", "three"):
+            cache.put(key, [key * 10])
+        self.assertEqual(cache.stats["disk_entries"], 2)
+        self.assertFalse(os.path.isfile(os.path.join(self.path, "one.json")))
+        self.assertTrue(os.path.isfile(os.path.join(self.path,
+                                                    "three.json")))
+
+    def test_age_eviction(self):
+        cache = self.get_cache(max_age=60)
+        with mock.patch("time.time", return_value=1000.0):
+            cache.put("key", ["hello"])
+        with mock.patch("time.time", return_value=1030.0):
+            self.assertEqual(cache.get("key"), ["hello"])
+        with mock.patch("time.time", return_value=1061.0):
+            self.assertIsNone(cache.get("key"))
+        self.assertEqual(cache.stats["hits"], 1)
+        self.assertEqual(cache.stats["misses"], 1)
+        self.assertEqual(cache.stats["memory_entries"], 0)
+        self.assertEqual(cache.stats["disk_entries"], 0)
+        self.assertFalse(os.path.isfile(os.path.join(self.path, "key.json")))
+
+    def test_load_disk_index(self):
+        self.get_cache().put("key", ["hello"])
+        cache = self.get_cache()
+        self.assertEqual(cache.stats["disk_entries"], 1)
+        self.assertEqual(cache.get("key"), ["hello"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Development System
+#
+# Copyright 2008-2021 Neongecko.com Inc. | All Rights Reserved
+#
+# Notice of License - Duplicating this Notice of License near the start of any file containing
+# a derivative of this software is a condition of license for this software.
+# Friendly Licensing:
+# No charge, open source royalty free use of the Neon AI software source and object is offered for
+# educational users, noncommercial enthusiasts, Public Benefit Corporations (and LLCs) and
+# Social Purpose Corporations (and LLCs). Developers can contact developers@neon.ai
+# For commercial licensing, distribution of derivative works or redistribution please contact licenses@neon.ai
+# Distributed on an "AS IS” basis without warranties or conditions of any kind, either express or implied.
+# Trademarks of Neongecko: Neon AI(TM), Neon Assist (TM), Neon Communicator(TM), Klat(TM)
+# Authors: Guy Daniels, Daniel McKnight, Regina Bloomstine, Elon Gasper, Richard Leeds
+#
+# Specialized conversational reconveyance options from Conversation Processing Intelligence Corp.
+import os
+import sys
+import mock
+import unittest
+
+from threading import Lock
+from time import sleep
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from neon_speech.stt import STTEngineRegistry, stt_config_hash
+
+CONFIG = {"stt": {"module": "mock_stt", "warm_up": False}}
+
+
+class MockSTT:
+    can_stream = False
+    lang = "en-us"
+
+
+class TestSTTEngineRegistry(unittest.TestCase):
+    def setUp(self) -> None:
+        self.registry = STTEngineRegistry()
+        patcher = mock.patch("neon_speech.stt.STTFactory.create",
+                             side_effect=lambda config: MockSTT())
+        self.create = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_release_returns_to_idle(self):
+        engine = self.registry.acquire(CONFIG)
+        self.registry.release(engine)
+        self.assertIs(self.registry.acquire(CONFIG), engine)
+        self.assertEqual(self.create.call_count, 1)
+
+    def test_create_when_leased(self):
+        engine = self.registry.acquire(CONFIG)
+        other = self.registry.acquire(CONFIG)
+        self.assertIsNot(engine, other)
+        self.assertEqual(self.create.call_count, 2)
+
+    def test_borrow_shared_engine(self):
+        engine = self.registry.acquire(CONFIG)
+        lock = Lock()
+        self.registry.share(engine, lock, CONFIG)
+        borrowed = self.registry.acquire(CONFIG)
+        self.assertIs(borrowed, engine)
+        self.assertTrue(lock.locked())
+        self.registry.release(borrowed)
+        self.assertFalse(lock.locked())
+        self.assertIs(self.registry.acquire(CONFIG), engine)
+        self.assertEqual(self.create.call_count, 1)
+
+    def test_create_when_shared_engine_busy(self):
+        engine = self.registry.acquire(CONFIG)
+        lock = Lock()
+        self.registry.share(engine, lock, CONFIG)
+        with lock:
+            other = self.registry.acquire(CONFIG)
+        self.assertIsNot(other, engine)
+        self.assertEqual(self.create.call_count, 2)
+
+    def test_unshare(self):
+        engine = self.registry.acquire(CONFIG)
+        lock = Lock()
+        self.registry.share(engine, lock, CONFIG)
+        self.registry.unshare(engine)
+        self.assertIsNot(self.registry.acquire(CONFIG), engine)
+        self.assertFalse(lock.locked())
+
+    def test_reap_idle_engines(self):
+        config = {"stt": dict(CONFIG["stt"], idle_timeout=0.1)}
+        engine = self.registry.acquire(config)
+        self.registry.release(engine)
+        sleep(0.5)
+        self.assertIsNot(self.registry.acquire(config), engine)
+        self.assertEqual(self.create.call_count, 2)
+
+    def test_config_change_uses_new_engine(self):
+        engine = self.registry.acquire(CONFIG)
+        self.registry.release(engine)
+        config = {"stt": dict(CONFIG["stt"], lang="uk-ua")}
+        self.assertNotEqual(stt_config_hash(config), stt_config_hash(CONFIG))
+        self.assertIsNot(self.registry.acquire(config), engine)
+
+    def test_service_keys_ignored(self):
+        config = {"stt": dict(CONFIG["stt"], idle_timeout=10, api_workers=4,
+                              api_stream_timeout=5, api_max_streams=1)}
+        self.assertEqual(stt_config_hash(config), stt_config_hash(CONFIG))
+
+    def test_prewarm(self):
+        timing = self.registry.prewarm(CONFIG)
+        self.assertIn("create", timing)
+        self.registry.acquire(CONFIG)
+        self.assertEqual(self.create.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()